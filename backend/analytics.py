@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# granularity -> (rollup collection, bucket length)
+GRANULARITIES = {
+    "hour": ("analytics_hourly", timedelta(hours=1)),
+    "day": ("analytics_daily", timedelta(days=1)),
+}
+MAX_BUCKETS = 800
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    at = at.astimezone(timezone.utc)
+    if granularity == "day":
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_count(start: datetime, end: datetime, granularity: str) -> int:
+    """Number of buckets read_series returns for [start, end]: from start's bucket up to end inclusive."""
+    step = GRANULARITIES[granularity][1]
+    return (end - bucket_start(start, granularity)) // step + 1
+
+
+def _key(value) -> str:
+    # Dimension values become document field names, which cannot contain dots or start with $
+    value = getattr(value, "value", value)
+    return str(value).replace(".", "_").replace("$", "_") or "unknown"
+
+
+class RollupAggregator:
+    """Accumulates counters per time bucket in memory and flushes them to the rollup collections.
+
+    Write handlers record events synchronously; a background task turns the
+    buffered counters into one upsert per bucket every flush interval, so a burst
+    of bookings costs a handful of writes instead of one per event and rollup.
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(Counter)
+
+    def record(self, metric: str, amount=1, at: Optional[datetime] = None):
+        at = at or datetime.now(timezone.utc)
+        for granularity, (collection, _) in GRANULARITIES.items():
+            self._pending[(collection, bucket_start(at, granularity).isoformat())][metric] += amount
+
+    def booking_created(self, category_id: Optional[str], status: str):
+        self.record("bookings.created")
+        self.record(f"bookings.status.{_key(status)}")
+        self.record(f"bookings.category.{_key(category_id)}")
+
+    def booking_status_changed(self, status: str):
+        self.record(f"bookings.status.{_key(status)}")
+
+    def payment_succeeded(self, purpose: Optional[str], amount: int):
+        self.record(f"revenue.{_key(purpose)}", amount)
+
+    def user_registered(self, role: str):
+        self.record(f"users.{_key(role)}")
+
+    async def flush(self, db):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(Counter)
+        ops = defaultdict(list)
+        for (collection, bucket), counts in pending.items():
+            ops[collection].append(UpdateOne({"_id": bucket}, {"$inc": dict(counts)}, upsert=True))
+        for collection, batch in ops.items():
+            try:
+                await db[collection].bulk_write(batch, ordered=False)
+            except Exception as e:
+                logger.error(f"Analytics flush to {collection} failed, will retry: {e}")
+                for (c, bucket), counts in pending.items():
+                    if c == collection:
+                        self._pending[(c, bucket)].update(counts)
+
+    async def run(self, db, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush(db)
+
+
+async def read_series(db, start: datetime, end: datetime, granularity: str):
+    collection, step = GRANULARITIES[granularity]
+    first = bucket_start(start, granularity)
+    docs = await db[collection].find(
+        {"_id": {"$gte": first.isoformat(), "$lte": end.astimezone(timezone.utc).isoformat()}}
+    ).to_list(None)
+    by_bucket = {d.pop("_id"): d for d in docs}
+
+    series = []
+    bucket = first
+    while bucket <= end:
+        doc = by_bucket.get(bucket.isoformat(), {})
+        bookings = doc.get("bookings", {})
+        series.append({
+            "bucket": bucket.isoformat(),
+            "bookings": {
+                "created": bookings.get("created", 0),
+                "by_status": bookings.get("status", {}),
+                "by_category": bookings.get("category", {}),
+            },
+            # Amounts are stored in paise like payments; reported in rupees like /admin/stats
+            "revenue": {purpose: amount / 100 for purpose, amount in doc.get("revenue", {}).items()},
+            "new_users": doc.get("users", {}),
+        })
+        bucket += step
+    return series
@@ -1,23 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import asyncio
+import hashlib
 import os
+import time
+
+from cache import TTLCache
 
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "endless-path-secret-key-2025-vijayawada")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
+# Stream tokens travel in URLs (EventSource cannot send headers), so they only open the
+# booking stream and expire quickly; an established stream is not cut off by the expiry
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.environ.get("STREAM_TOKEN_EXPIRE_SECONDS", "60"))
+STREAM_SCOPE = "bookings.stream"
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "10000"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes verify_and_update flag hashes made
+# with any other cost, so they get rehashed on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_password_pool_stats = {"pending": 0, "completed": 0, "rejected": 0}
+
+# Verified token -> payload, each entry expiring with the token's own exp claim
+_token_cache = TTLCache(ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60, maxsize=TOKEN_CACHE_SIZE)
+# Keyed by token digest, which is also what is shared with the other workers
+_revoked_tokens = TTLCache(ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60, maxsize=TOKEN_CACHE_SIZE)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def _run_password_work(fn, *args):
+    if _password_pool_stats["pending"] >= PASSWORD_HASH_MAX_PENDING:
+        _password_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _password_pool_stats["pending"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_pool, fn, *args)
+    finally:
+        _password_pool_stats["pending"] -= 1
+        _password_pool_stats["completed"] += 1
+
+async def hash_password(password: str) -> str:
+    return await _run_password_work(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; also returns a new hash when the stored one uses a stale cost."""
+    return await _run_password_work(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def password_pool_stats() -> dict:
+    pending = _password_pool_stats["pending"]
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "in_flight": min(pending, PASSWORD_HASH_WORKERS),
+        "queue_depth": max(pending - PASSWORD_HASH_WORKERS, 0),
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "completed": _password_pool_stats["completed"],
+        "rejected": _password_pool_stats["rejected"],
+    }
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -29,20 +88,69 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_stream_token(user: dict) -> str:
+    return create_access_token(
+        {"sub": user["sub"], "role": user.get("role"), "scope": STREAM_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS)
+    )
+
+def _credentials_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 def decode_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_exception()
+
+def verify_token(token: str, scope: Optional[str] = None):
+    """Payload of a valid token; access tokens carry no scope, so a stream token is never accepted as one."""
+    if _revoked_tokens.get(token_digest(token)):
+        raise _credentials_exception()
+    payload = _token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        _token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    if payload.get("scope") != scope:
+        raise _credentials_exception()
+    return payload
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def mark_revoked(digest: str, ttl: float):
+    if ttl > 0:
+        _revoked_tokens.set(digest, True, ttl=ttl)
+
+def revoke_token(token: str) -> Optional[Tuple[str, float]]:
+    """Reject the token in this process until it would have expired anyway.
+
+    Returns (digest, seconds left) for sharing the revocation with other workers,
+    or None when the token is malformed or already expired.
+    """
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp", 0)
+    except JWTError:
+        return None
+    _token_cache.invalidate(token)
+    remaining = exp - time.time()
+    if remaining <= 0:
+        return None
+    digest = token_digest(token)
+    mark_revoked(digest, remaining)
+    return digest, remaining
+
+def token_cache_stats() -> dict:
+    return {**_token_cache.stats(), "revoked": len(_revoked_tokens)}
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = verify_token(token)
     return payload
 
 def require_role(required_roles: list):
@@ -0,0 +1,159 @@
+import logging
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+from models import BookingStatus
+
+logger = logging.getLogger(__name__)
+
+# A booking in one of these statuses no longer holds its provider's time
+RELEASED_STATUSES = (BookingStatus.CANCELLED, BookingStatus.REJECTED)
+MAX_AVAILABILITY_DAYS = 31
+
+
+class SlotCalendar:
+    """Provider time divided into fixed slots, reserved in the ``provider_slots`` collection.
+
+    A booking holds every slot its service's duration overlaps, one document per
+    slot. The unique (provider_id, slot_start) index makes the database the
+    arbiter: two bookings can never both insert the same slot, so overlapping
+    requests cannot double-book a provider. Slot keys are UTC ISO strings;
+    scheduled times without an offset are read in the calendar's timezone.
+    """
+
+    def __init__(self, slot_minutes: int = 30, day_start_hour: int = 8, day_end_hour: int = 20,
+                 tz: str = "Asia/Kolkata"):
+        self.slot = timedelta(minutes=slot_minutes)
+        self.day_start = time(day_start_hour)
+        self.day_end = time(day_end_hour) if day_end_hour < 24 else None
+        self.tz = ZoneInfo(tz)
+
+    def parse(self, scheduled: str) -> datetime:
+        at = datetime.fromisoformat(scheduled)
+        return at.replace(tzinfo=self.tz) if at.tzinfo is None else at
+
+    def _floor(self, at: datetime) -> datetime:
+        local = at.astimezone(self.tz)
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight + self.slot * ((local - midnight) // self.slot)
+
+    def slot_keys(self, start: datetime, duration_minutes: int) -> list:
+        """Keys of every slot overlapping [start, start + duration), in ascending order."""
+        end = start + timedelta(minutes=max(duration_minutes, 1))
+        slot = self._floor(start)
+        keys = []
+        while slot < end:
+            keys.append(slot.astimezone(timezone.utc).isoformat())
+            slot += self.slot
+        return keys
+
+    def day_bounds(self, day: date) -> tuple:
+        end = datetime.combine(day, self.day_end, self.tz) if self.day_end else datetime.combine(
+            day + timedelta(days=1), time(0), self.tz
+        )
+        return datetime.combine(day, self.day_start, self.tz), end
+
+    def check_bookable(self, start: datetime, duration_minutes: int, now: Optional[datetime] = None):
+        """Reject, with a 400, a booking that starts in the past or does not fit inside one working day."""
+        if start < (now or datetime.now(timezone.utc)):
+            raise HTTPException(status_code=400, detail="Bookings must be scheduled in the future")
+        local = start.astimezone(self.tz)
+        day_start, day_end = self.day_bounds(local.date())
+        if local < day_start or local + timedelta(minutes=max(duration_minutes, 1)) > day_end:
+            hours = f"{self.day_start:%H:%M}-{self.day_end:%H:%M}" if self.day_end else f"{self.day_start:%H:%M}-24:00"
+            raise HTTPException(status_code=400, detail=f"Bookings must fall within working hours ({hours} {self.tz})")
+
+    async def reserve(self, db, provider_id: str, booking_id: str, start: datetime, duration_minutes: int):
+        keys = self.slot_keys(start, duration_minutes)
+        try:
+            # Ordered, ascending inserts: of two overlapping requests the one that takes the
+            # earliest shared slot wins the rest too, so a clash never leaves both failing
+            await db.provider_slots.insert_many(
+                [{"provider_id": provider_id, "slot_start": key, "booking_id": booking_id} for key in keys],
+                ordered=True
+            )
+        except BulkWriteError as e:
+            taken = keys[:e.details.get("nInserted", 0)]
+            if taken:
+                await db.provider_slots.delete_many(
+                    {"provider_id": provider_id, "slot_start": {"$in": taken}, "booking_id": booking_id}
+                )
+            raise HTTPException(status_code=409, detail="The provider is already booked at that time")
+
+    async def release(self, db, booking_id: str):
+        await db.provider_slots.delete_many({"booking_id": booking_id})
+
+    def _day_grid(self, day: date) -> list:
+        start, end = self.day_bounds(day)
+        grid = []
+        while start < end:
+            grid.append(start)
+            start += self.slot
+        return grid
+
+    async def free_slots(self, db, provider_id: str, first_day: date, last_day: date,
+                         duration_minutes: Optional[int] = None, now: Optional[datetime] = None) -> list:
+        """Start times within working hours where a booking of duration_minutes fits, in local time."""
+        now = now or datetime.now(timezone.utc)
+        days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        grids = [self._day_grid(day) for day in days]
+        grids = [grid for grid in grids if grid]
+        if not grids:
+            return []
+        # Served from the (provider_id, slot_start) index alone
+        taken = await db.provider_slots.find(
+            {
+                "provider_id": provider_id,
+                "slot_start": {
+                    "$gte": grids[0][0].astimezone(timezone.utc).isoformat(),
+                    "$lte": grids[-1][-1].astimezone(timezone.utc).isoformat(),
+                },
+            },
+            {"slot_start": 1, "_id": 0}
+        ).to_list(None)
+        taken = {doc["slot_start"] for doc in taken}
+
+        span = timedelta(minutes=duration_minutes) if duration_minutes else self.slot
+        needed = max(1, math.ceil(span / self.slot))
+        free = []
+        for grid in grids:
+            keys = [slot.astimezone(timezone.utc).isoformat() for slot in grid]
+            for i in range(len(grid) - needed + 1):
+                if grid[i] < now or any(key in taken for key in keys[i:i + needed]):
+                    continue
+                free.append({"start": grid[i].isoformat(), "end": (grid[i] + span).isoformat()})
+        return free
+
+
+async def backfill_booking_slots(db, calendar: SlotCalendar):
+    """Reserve slots for upcoming bookings made before reservations existed; clashes are logged, not resolved."""
+    durations = {
+        str(s["_id"]): s.get("duration_minutes", 0)
+        for s in await db.services.find({}, {"duration_minutes": 1}).to_list(None)
+    }
+    reserved = conflicts = skipped = 0
+    now = datetime.now(timezone.utc)
+    async for booking in db.bookings.find(
+        {"status": {"$in": [BookingStatus.PENDING, BookingStatus.ACCEPTED]}},
+        {"provider_id": 1, "service_id": 1, "scheduled_date": 1}
+    ):
+        try:
+            start = calendar.parse(booking["scheduled_date"])
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+        if start < now or await db.provider_slots.find_one({"booking_id": str(booking["_id"])}, {"_id": 1}):
+            continue
+        try:
+            await calendar.reserve(db, booking["provider_id"], str(booking["_id"]), start,
+                                   durations.get(booking["service_id"], 0))
+            reserved += 1
+        except HTTPException:
+            conflicts += 1
+            logger.warning(f"Booking {booking['_id']} overlaps another booking of provider {booking['provider_id']}")
+    logger.info(f"Booking slots backfilled: {reserved} reserved, {conflicts} conflicting, {skipped} without a usable date")
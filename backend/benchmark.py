@@ -0,0 +1,386 @@
+"""Load benchmark for the API.
+
+Starts server:app in-process against a local MongoDB (--mongo url) or a
+mongomock-motor stand-in (--mongo mock), seeds realistic volumes, drives
+concurrent load against the hot endpoints and writes latency percentiles
+and throughput to JSON so runs can be compared across commits.
+
+    python benchmark.py --mongo mock --services 20000 --bookings 100000
+    python benchmark.py --compare bench_results/<previous>.json
+    python benchmark.py --serialization 1000   # list response serialization only
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "endless_path_bench")
+os.environ.setdefault("PAYMENT_GATEWAY", "stub")
+
+import httpx
+import pymongo
+import uvicorn
+
+import server
+from search import build_service_index
+
+WORDS = (
+    "bike car repair tyre puncture fuel electrical mobile laptop cleaning water can grocery "
+    "kirana printing visiting cards pamphlet cab sharing driver lunch box tiffin tuition skill "
+    "tractor fertilizer scrap e-waste recycling plumber painter carpenter event catering"
+).split()
+BENCH_PASSWORD = "bench-password"
+SEED_BATCH = 10000
+SERVICE_DURATIONS = (30, 60, 90)
+# Booking requests spread over this many days of working hours so slot clashes stay rare
+BOOKING_DAYS = 365
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=Path(__file__).parent).strip()
+    except Exception:
+        return "unknown"
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def seed(db, services, bookings, customers, providers):
+    from auth import hash_password
+    from models import BookingStatus, ProviderStatus, UserRole
+
+    password_hash = await hash_password(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc)
+    categories = await db.categories.find({}, {"name": 1}).to_list(None)
+
+    def created_at(i):
+        return (now - timedelta(seconds=i)).isoformat()
+
+    customer_docs = [{
+        "email": f"customer{i}@bench.endlesspath.com", "password": password_hash, "full_name": f"Customer {i}",
+        "phone": "+910000000000", "role": UserRole.CUSTOMER, "credits": 10 ** 9, "is_active": True,
+        "created_at": created_at(i)
+    } for i in range(customers)]
+    provider_docs = [{
+        "email": f"provider{i}@bench.endlesspath.com", "password": password_hash, "full_name": f"Provider {i}",
+        "phone": "+910000000000", "role": UserRole.PROVIDER, "credits": 5, "is_active": True,
+        "created_at": created_at(i)
+    } for i in range(providers)]
+    customer_ids = [str(i) for i in (await db.users.insert_many(customer_docs)).inserted_ids]
+    provider_ids = [str(i) for i in (await db.users.insert_many(provider_docs)).inserted_ids]
+    await db.provider_profiles.insert_many([{
+        "user_id": provider_id, "service_category": "General", "experience_years": 3, "description": "",
+        "status": ProviderStatus.APPROVED, "rating": 0.0, "rating_sum": 0, "rating_count": 0,
+        "total_earnings": 0.0, "completed_jobs": 0, "created_at": created_at(i)
+    } for i, provider_id in enumerate(provider_ids)])
+
+    service_ids = []
+    for start in range(0, services, SEED_BATCH):
+        batch = []
+        for i in range(start, min(start + SEED_BATCH, services)):
+            category = random.choice(categories)
+            provider = random.randrange(providers)
+            batch.append({
+                "title": " ".join(random.sample(WORDS, 3)).title(),
+                "description": " ".join(random.sample(WORDS, 12)),
+                "category_id": str(category["_id"]), "category_name": category["name"],
+                "provider_id": provider_ids[provider], "provider_name": f"Provider {provider}",
+                "price": float(random.randrange(100, 5000)), "duration_minutes": random.choice(SERVICE_DURATIONS),
+                "location": "Vijayawada", "rating": 0.0, "reviews_count": 0, "created_at": created_at(i)
+            })
+        service_ids += [str(i) for i in (await db.services.insert_many(batch)).inserted_ids]
+
+    statuses = list(BookingStatus)
+    for start in range(0, bookings, SEED_BATCH):
+        batch = []
+        for i in range(start, min(start + SEED_BATCH, bookings)):
+            customer = random.randrange(customers)
+            provider = random.randrange(providers)
+            batch.append({
+                "customer_id": customer_ids[customer], "customer_name": f"Customer {customer}",
+                "service_id": random.choice(service_ids), "service_title": "Bench service",
+                "provider_id": provider_ids[provider], "provider_name": f"Provider {provider}",
+                "price": float(random.randrange(100, 5000)),
+                "status": random.choice(statuses), "scheduled_date": created_at(-i * 3600)[:16],
+                "notes": None, "created_at": created_at(i), "completed_at": None
+            })
+        await db.bookings.insert_many(batch)
+
+    return {"customer_ids": customer_ids, "service_ids": service_ids,
+            "category_ids": [str(c["_id"]) for c in categories]}
+
+
+def start_server(port, use_mock):
+    """Run uvicorn on its own thread and event loop so load generation does not share the API's loop."""
+    if use_mock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[os.environ["DB_NAME"]]
+        server.catalog_db = server.db
+
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning")
+    api = uvicorn.Server(config)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(api.serve(),), daemon=True)
+    thread.start()
+    while not api.started:
+        time.sleep(0.05)
+    return api, loop, thread
+
+
+def _bookable_time():
+    """A future slot-aligned start inside the working day that fits the longest service, in the booking timezone."""
+    calendar = server.slot_calendar
+    day = datetime.now(calendar.tz).date() + timedelta(days=random.randrange(1, BOOKING_DAYS + 1))
+    opens, closes = calendar.day_bounds(day)
+    starts = int((closes - opens - timedelta(minutes=max(SERVICE_DURATIONS))) / calendar.slot) + 1
+    return opens + calendar.slot * random.randrange(starts)
+
+
+def scenarios(seeded, tokens):
+    def services(client):
+        params = {"limit": 20}
+        if random.random() < 0.5:
+            params["category_id"] = random.choice(seeded["category_ids"])
+        if random.random() < 0.3:
+            params.update(search=random.choice(WORDS)[:4], search_mode="prefix")
+        return client.get("/api/services", params=params)
+
+    def categories(client):
+        return client.get("/api/categories")
+
+    def login(client):
+        email = f"customer{random.randrange(len(seeded['customer_ids']))}@bench.endlesspath.com"
+        return client.post("/api/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+
+    def create_booking(client):
+        return client.post("/api/bookings", headers={"Authorization": f"Bearer {random.choice(tokens)}"}, json={
+            "service_id": random.choice(seeded["service_ids"]),
+            "scheduled_date": _bookable_time().isoformat(),
+            "notes": "benchmark"
+        })
+
+    def my_bookings(client):
+        return client.get("/api/bookings/customer/me", params={"limit": 20},
+                          headers={"Authorization": f"Bearer {random.choice(tokens)}"})
+
+    return {
+        "services": services,
+        "categories": categories,
+        "login": login,
+        "bookings_create": create_booking,
+        "bookings_list": my_bookings,
+    }
+
+
+async def run_scenario(base_url, request, concurrency, duration):
+    latencies = []
+    # 409s (e.g. a booking slot already taken) are expected under load; anything else >= 400 is an error
+    errors = conflicts = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors, conflicts
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status_code = (await request(client)).status_code
+                except httpx.HTTPError:
+                    status_code = None
+                latencies.append((time.perf_counter() - start) * 1000)
+                conflicts += status_code == 409
+                errors += status_code is None or (status_code >= 400 and status_code != 409)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "conflicts": conflicts,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 99), 2) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+    }
+
+
+async def drive_load(base_url, seeded, args):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        tokens = []
+        for i in range(min(20, len(seeded["customer_ids"]))):
+            response = await client.post("/api/auth/login", json={
+                "email": f"customer{i}@bench.endlesspath.com", "password": BENCH_PASSWORD
+            })
+            tokens.append(response.json()["access_token"])
+
+    results = {}
+    available = scenarios(seeded, tokens)
+    for name in args.endpoints:
+        print(f"  {name}: {args.concurrency} concurrent clients for {args.duration}s")
+        results[name] = await run_scenario(base_url, available[name], args.concurrency, args.duration)
+        print(f"    {results[name]}")
+    return results
+
+
+def serialization_benchmark(items, rounds=50):
+    """Per-item cost of building BookingResponse models and letting response_model re-validate them,
+    against shaping the projected documents directly and rendering with orjson."""
+    from typing import List
+
+    from bson import ObjectId
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from models import BookingResponse
+    from responses import list_response
+
+    now = datetime.now(timezone.utc)
+    docs = [{
+        "_id": ObjectId(), "customer_id": str(ObjectId()), "customer_name": f"Customer {i}",
+        "service_id": str(ObjectId()), "service_title": "Bench service", "provider_id": str(ObjectId()),
+        "provider_name": f"Provider {i}", "status": "pending", "scheduled_date": "2026-01-01T10:00",
+        "notes": "benchmark", "created_at": (now - timedelta(seconds=i)).isoformat(), "completed_at": None
+    } for i in range(items)]
+    field = create_response_field(name="Response_bench", type_=List[BookingResponse])
+
+    async def legacy():
+        result = [BookingResponse(
+            id=str(b["_id"]), customer_id=b["customer_id"], customer_name=b["customer_name"],
+            service_id=b["service_id"], service_title=b["service_title"], provider_id=b["provider_id"],
+            provider_name=b["provider_name"], status=b["status"], scheduled_date=b["scheduled_date"],
+            notes=b.get("notes"), created_at=b["created_at"], completed_at=b.get("completed_at")
+        ) for b in docs]
+        content = await serialize_response(field=field, response_content=result, is_coroutine=True)
+        return JSONResponse(content).body
+
+    async def fast():
+        return list_response(BookingResponse, docs).body
+
+    async def measure(path):
+        await path()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            body = await path()
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings), body
+
+    results = {}
+    for name, path in (("serialization_legacy", legacy), ("serialization_fast", fast)):
+        timings, body = asyncio.run(measure(path))
+        results[name] = {
+            "items": items,
+            "bytes": len(body),
+            "p50_ms": round(_percentile(timings, 50), 3),
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "us_per_item": round(_percentile(timings, 50) * 1000 / items, 3),
+        }
+        print(f"  {name}: {results[name]}")
+    return results
+
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    print(f"\nCompared with {baseline_path}:")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        p95_change = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+        rps_change = (current["rps"] - previous["rps"]) / previous["rps"] * 100 if previous["rps"] else 0
+        print(f"  {name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms ({p95_change:+.1f}%), "
+              f"rps {previous['rps']} -> {current['rps']} ({rps_change:+.1f}%)")
+
+
+def run_load(args):
+    if args.mongo == "url":
+        pymongo.MongoClient(os.environ["MONGO_URL"]).drop_database(os.environ["DB_NAME"])
+    port = _free_port()
+    api, loop, thread = start_server(port, use_mock=args.mongo == "mock")
+    try:
+        print(f"Seeding {args.services} services and {args.bookings} bookings...")
+        started = time.perf_counter()
+        seeded = asyncio.run_coroutine_threadsafe(
+            seed(server.db, args.services, args.bookings, args.customers, args.providers), loop
+        ).result()
+        server.search_index = asyncio.run_coroutine_threadsafe(build_service_index(server.catalog_db), loop).result()
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+        return asyncio.run(drive_load(f"http://127.0.0.1:{port}", seeded, args))
+    finally:
+        api.should_exit = True
+        thread.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endless Path API load benchmark")
+    parser.add_argument("--mongo", choices=["mock", "url"], default="mock",
+                        help="mongomock-motor stand-in, or the MongoDB at MONGO_URL (database DB_NAME is dropped)")
+    parser.add_argument("--services", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--providers", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--endpoints", nargs="+", default=list(scenarios({}, []).keys()),
+                        choices=list(scenarios({}, []).keys()))
+    parser.add_argument("--output", help="defaults to bench_results/<commit>-<timestamp>.json")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--serialization", type=int, metavar="ITEMS",
+                        help="only benchmark serializing a list response of ITEMS bookings")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.serialization:
+        print(f"Serializing {args.serialization} bookings...")
+        results = serialization_benchmark(args.serialization)
+    else:
+        results = run_load(args)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+    output = Path(args.output or f"bench_results/{commit}-{datetime.now():%Y%m%d%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_ID = "catalog_version"
+# Suffixes CompressionMiddleware appends to the ETag of an encoded representation
+ENCODING_ETAG_SUFFIXES = ("-br", "-gzip")
+
+
+class CatalogVersion:
+    """Counter bumped on every write to services or categories.
+
+    The value lives in the ``meta`` collection so all workers agree on it; each
+    worker keeps a copy that it updates on its own writes and polls in the
+    background, so checking an ETag never waits on Mongo.
+    """
+
+    def __init__(self):
+        self.value: Optional[int] = None
+
+    async def refresh(self, db):
+        doc = await db.meta.find_one({"_id": CATALOG_VERSION_ID}, {"version": 1})
+        # Never step back: a lagging secondary may not have seen this worker's own bump yet
+        self.value = max(self.value or 0, doc["version"] if doc else 0)
+
+    async def bump(self, db):
+        doc = await db.meta.find_one_and_update(
+            {"_id": CATALOG_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        self.value = doc["version"]
+
+    async def run(self, db, interval: float):
+        while True:
+            try:
+                await self.refresh(db)
+            except Exception as e:
+                logger.error(f"Catalog version refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def etag(self, resource: str) -> Optional[str]:
+        return None if self.value is None else f'"{resource}-v{self.value}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in ENCODING_ETAG_SUFFIXES:
+            if candidate.endswith(f'{suffix}"'):
+                candidate = candidate[:-len(suffix) - 1] + '"'
+                break
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,86 @@
+import logging
+from datetime import datetime, timezone
+
+from pymongo import UpdateMany, UpdateOne
+
+from models import BookingStatus
+
+logger = logging.getLogger(__name__)
+
+
+def month_key(completed_at: str) -> str:
+    return completed_at[:7]
+
+
+def completion_delta(price: float, completed_at: str, sign: int = 1) -> dict:
+    """$inc document for provider_profiles when a booking enters (sign=1) or leaves (sign=-1) COMPLETED."""
+    return {
+        "completed_jobs": sign,
+        "total_earnings": sign * price,
+        f"earnings_by_month.{month_key(completed_at)}": sign * price,
+    }
+
+
+def monthly_series(earnings_by_month: dict, months: int, now: datetime = None):
+    now = now or datetime.now(timezone.utc)
+    year, month = now.year, now.month
+    series = []
+    for _ in range(months):
+        key = f"{year:04d}-{month:02d}"
+        series.append({"month": key, "earnings": earnings_by_month.get(key, 0)})
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    series.reverse()
+    return series
+
+
+async def backfill_booking_prices(db):
+    """Copy the service price onto bookings created before bookings recorded their own price."""
+    from bson import ObjectId
+
+    service_ids = await db.bookings.distinct("service_id", {"price": {"$exists": False}})
+    lookup_ids = []
+    for service_id in service_ids:
+        try:
+            lookup_ids.append(ObjectId(service_id))
+        except Exception:
+            lookup_ids.append(service_id)
+    services = await db.services.find({"_id": {"$in": lookup_ids}}, {"price": 1}).to_list(None)
+    ops = [
+        UpdateMany({"service_id": str(s["_id"]), "price": {"$exists": False}}, {"$set": {"price": s.get("price", 0)}})
+        for s in services
+    ]
+    if ops:
+        await db.bookings.bulk_write(ops, ordered=False)
+    logger.info(f"Booking prices backfilled for {len(ops)} services")
+
+
+async def rebuild_provider_earnings(db):
+    """Recompute completed_jobs, total_earnings and earnings_by_month from completed bookings."""
+    await backfill_booking_prices(db)
+    totals = await db.bookings.aggregate([
+        {"$match": {"status": BookingStatus.COMPLETED}},
+        {"$group": {
+            "_id": {"provider_id": "$provider_id", "month": {"$substr": [{"$ifNull": ["$completed_at", "$created_at"]}, 0, 7]}},
+            "earnings": {"$sum": {"$ifNull": ["$price", 0]}},
+            "jobs": {"$sum": 1}
+        }}
+    ]).to_list(None)
+
+    by_provider = {}
+    for t in totals:
+        provider = by_provider.setdefault(t["_id"]["provider_id"], {
+            "completed_jobs": 0, "total_earnings": 0.0, "earnings_by_month": {}
+        })
+        provider["completed_jobs"] += t["jobs"]
+        provider["total_earnings"] += t["earnings"]
+        provider["earnings_by_month"][t["_id"]["month"]] = t["earnings"]
+
+    await db.provider_profiles.update_many(
+        {"user_id": {"$nin": list(by_provider)}},
+        {"$set": {"completed_jobs": 0, "total_earnings": 0.0, "earnings_by_month": {}}}
+    )
+    if by_provider:
+        await db.provider_profiles.bulk_write([
+            UpdateOne({"user_id": provider_id}, {"$set": fields}) for provider_id, fields in by_provider.items()
+        ], ordered=False)
+    logger.info(f"Earnings rebuilt for {len(by_provider)} providers")
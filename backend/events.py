@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+def booking_event(event_type: str, booking: dict, **changes) -> dict:
+    """Event delivered to the booking's customer and provider."""
+    payload = {
+        "id": str(booking["_id"]),
+        "customer_id": booking["customer_id"],
+        "provider_id": booking["provider_id"],
+        "service_id": booking.get("service_id"),
+        "service_title": booking.get("service_title"),
+        "customer_name": booking.get("customer_name"),
+        "provider_name": booking.get("provider_name"),
+        "status": getattr(booking.get("status"), "value", booking.get("status")),
+        "scheduled_date": booking.get("scheduled_date"),
+        "notes": booking.get("notes"),
+        "created_at": booking.get("created_at"),
+        "completed_at": booking.get("completed_at"),
+    }
+    payload.update({k: getattr(v, "value", v) for k, v in changes.items()})
+    return {
+        "type": event_type,
+        "audience": [booking["customer_id"], booking["provider_id"]],
+        "booking": payload,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class InProcessBroker:
+    """Fans events out to the SSE subscribers connected to this worker.
+
+    Each subscriber gets a bounded queue; a client that stops reading loses its
+    oldest events instead of growing memory without limit.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._sequence = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    async def start(self, db):
+        pass
+
+    async def close(self):
+        pass
+
+    async def publish(self, event: dict):
+        self.deliver(event, next(self._sequence))
+
+    def deliver(self, event: dict, event_id):
+        self.published += 1
+        for user_id in set(event["audience"]):
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped += 1
+                queue.put_nowait((event_id, event))
+
+    @contextlib.contextmanager
+    def subscribe(self, user_id: str):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[user_id].discard(queue)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self).__name__,
+            "users": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+class MongoBroker(InProcessBroker):
+    """Shares events between workers through a capped collection.
+
+    Publishing inserts into the collection; every worker tails it with a
+    tailable await cursor and delivers to its own local subscribers, so an
+    update handled by one worker reaches clients connected to any other.
+    """
+
+    def __init__(self, collection: str = "booking_events", size_bytes: int = 16 * 1024 * 1024,
+                 queue_size: int = 100, retry_delay: float = 1.0):
+        super().__init__(queue_size)
+        self.collection_name = collection
+        self.size_bytes = size_bytes
+        self.retry_delay = retry_delay
+        self._collection = None
+        self._task = None
+
+    async def start(self, db):
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass
+        self._collection = db[self.collection_name]
+        self._task = asyncio.create_task(self._tail())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+
+    async def publish(self, event: dict):
+        await self._collection.insert_one(dict(event))
+
+    async def _tail(self):
+        latest = await self._collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        last_id = latest["_id"] if latest else None
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id else {}
+            cursor = self._collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+            try:
+                while cursor.alive:
+                    async for doc in cursor:
+                        last_id = doc.pop("_id")
+                        self.deliver(doc, str(last_id))
+            except PyMongoError as e:
+                logger.warning(f"Event tail interrupted, reconnecting: {e}")
+            await asyncio.sleep(self.retry_delay)
+
+
+def create_broker(kind: str, queue_size: int = 100, size_bytes: int = 16 * 1024 * 1024):
+    if kind == "mongo":
+        return MongoBroker(size_bytes=size_bytes, queue_size=queue_size)
+    return InProcessBroker(queue_size=queue_size)
+
+
+async def sse_events(broker: InProcessBroker, user_id: str, heartbeat: float):
+    """Server-sent event stream of the events addressed to user_id, with comment heartbeats."""
+    with broker.subscribe(user_id) as queue:
+        yield "retry: 3000\n: connected\n\n"
+        while True:
+            try:
+                event_id, event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            data = json.dumps({"type": event["type"], "booking": event["booking"], "at": event["at"]})
+            yield f"id: {event_id}\nevent: {event['type']}\ndata: {data}\n\n"
@@ -0,0 +1,132 @@
+import csv
+import io
+from typing import AsyncIterator, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from responses import response_fields
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_BATCH_SIZE = 1000
+# Import responses list at most this many row errors; the failed count still covers every row
+MAX_REPORTED_ERRORS = 1000
+MAX_RECORD_CHARS = 1024 * 1024
+# Rows are buffered into chunks of roughly this size before being written to the socket
+CHUNK_BYTES = 64 * 1024
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value, default=str).decode()
+    return getattr(value, "value", value)
+
+
+async def stream_documents(cursor, model: type[BaseModel], fmt: str, exclude: tuple = ()) -> AsyncIterator[bytes]:
+    """Encode a Motor cursor shaped like ``model`` (minus ``exclude``) as NDJSON or CSV, one chunk per CHUNK_BYTES."""
+    fields = [(name, default) for name, default in response_fields(model) if name not in exclude]
+    columns = ["id", *(name for name, _ in fields)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = bytearray()
+    if fmt == "csv":
+        writer.writerow(columns)
+    async for doc in cursor:
+        row = {"id": str(doc["_id"]), **{name: doc.get(name, default) for name, default in fields}}
+        if fmt == "csv":
+            writer.writerow([_csv_value(row[column]) for column in columns])
+            pending += buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        else:
+            pending += orjson.dumps(row, default=str) + b"\n"
+        if len(pending) >= CHUNK_BYTES:
+            yield bytes(pending)
+            pending.clear()
+    if pending:
+        yield bytes(pending)
+
+
+def export_response(cursor, model: type[BaseModel], fmt: str, filename: str, exclude: tuple = ()) -> StreamingResponse:
+    return StreamingResponse(
+        stream_documents(cursor, model, fmt, exclude),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+
+def request_format(fmt: Optional[str], content_type: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "csv" if content_type and "csv" in content_type else "ndjson"
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    remainder = b""
+    async for chunk in chunks:
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8", errors="replace").rstrip("\r")
+    if remainder:
+        yield remainder.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def iter_import_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple]:
+    """Parse a streamed NDJSON or CSV body into (row number, dict or error message) as it arrives.
+
+    Row numbers count data rows from 1 (the CSV header is not a row). Blank
+    lines are skipped; a CSV field quoted across several lines is one row.
+    """
+    row_number = 0
+    header = None
+    record = ""
+    async for line in _lines(chunks):
+        if row_number == 0 and header is None:
+            # Spreadsheet exports often start with a byte order mark
+            line = line.lstrip("\ufeff")
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield row_number, f"Invalid JSON: {e}"
+                continue
+            yield row_number, row if isinstance(row, dict) else "Each line must be a JSON object"
+            continue
+
+        record = f"{record}\n{line}" if record else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2 and len(record) < MAX_RECORD_CHARS:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        if text.count('"') % 2:
+            row_number += 1
+            yield row_number, "Unterminated quoted field"
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells mean "not given", so optional fields keep their defaults
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        row_number += 1
+        yield row_number, "Unterminated quoted field"
+    elif fmt == "csv" and header is None:
+        raise HTTPException(status_code=400, detail="CSV import needs a header row")
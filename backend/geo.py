@@ -0,0 +1,72 @@
+import base64
+import json
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+MAX_RADIUS_M = 50_000
+DISTANCE_FIELD = "distance_m"
+
+
+def geo_point(latitude: float, longitude: float) -> dict:
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def encode_geo_cursor(docs: list, previous: Optional[tuple] = None) -> str:
+    """Cursor for the page after ``docs``: the last distance plus every id already returned at that distance.
+
+    The next page starts at that distance (``minDistance`` is inclusive), so ids
+    tied with the last one are excluded explicitly; ties spanning several pages
+    keep accumulating.
+    """
+    distance = docs[-1][DISTANCE_FIELD]
+    seen = [d["_id"] for d in docs if d[DISTANCE_FIELD] == distance]
+    if previous and previous[0] == distance:
+        seen = previous[1] + seen
+    payload = {"d": distance, "x": [[str(i), isinstance(i, ObjectId)] for i in seen]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_geo_cursor(cursor: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(payload["d"]), [ObjectId(i) if is_oid else i for i, is_oid in payload["x"]]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def nearby_pipeline(latitude: float, longitude: float, radius_m: float, category_id: Optional[str],
+                    limit: int, after: Optional[tuple], projection: dict) -> list:
+    near = {
+        "near": geo_point(latitude, longitude),
+        "distanceField": DISTANCE_FIELD,
+        "maxDistance": radius_m,
+        "spherical": True,
+        "key": "geo",
+    }
+    query = {}
+    if category_id:
+        query["category_id"] = category_id
+    if after:
+        near["minDistance"] = after[0]
+        query["_id"] = {"$nin": after[1]}
+    if query:
+        near["query"] = query
+    # $geoNear emits nearest first and stops at the $limit, so a page never sorts the whole radius
+    return [
+        {"$geoNear": near},
+        {"$limit": limit + 1},
+        {"$project": {**projection, DISTANCE_FIELD: 1}},
+    ]
+
+
+async def fetch_nearby(collection, latitude: float, longitude: float, radius_m: float,
+                       category_id: Optional[str], limit: int, cursor: Optional[str], projection: dict):
+    """One distance-ordered page of services within radius_m metres plus the next cursor."""
+    after = decode_geo_cursor(cursor) if cursor else None
+    pipeline = nearby_pipeline(latitude, longitude, radius_m, category_id, limit, after, projection)
+    docs = await collection.aggregate(pipeline).to_list(limit + 1)
+    next_cursor = encode_geo_cursor(docs[:limit], after) if len(docs) > limit else None
+    return docs[:limit], next_cursor
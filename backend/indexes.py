@@ -0,0 +1,133 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Every index the API relies on, by collection. Applied idempotently by ensure_indexes().
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("role", ASCENDING)], name="role"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_page"),
+        IndexModel([("role", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="role_created_at_page"),
+    ],
+    "provider_profiles": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_page"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="status_created_at_page"),
+    ],
+    "services": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_page"),
+        IndexModel([("category_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="category_id_created_at_page"),
+        IndexModel([("provider_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="provider_id_created_at_page"),
+        IndexModel([("title", TEXT), ("description", TEXT)], name="title_description_text",
+                   weights={"title": 3, "description": 1}),
+        # Services without coordinates have no "geo" field and are left out of the index
+        IndexModel([("geo", GEOSPHERE), ("category_id", ASCENDING)], name="geo_2dsphere_category_id"),
+    ],
+    "bookings": [
+        IndexModel([("customer_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="customer_id_created_at_page"),
+        IndexModel([("provider_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="provider_id_created_at_page"),
+        IndexModel([("provider_id", ASCENDING), ("status", ASCENDING)], name="provider_id_status"),
+    ],
+    "provider_slots": [
+        # One document per reserved slot; the unique key is what rules out double bookings
+        IndexModel([("provider_id", ASCENDING), ("slot_start", ASCENDING)], name="provider_slot_unique", unique=True),
+        IndexModel([("booking_id", ASCENDING)], name="booking_id"),
+    ],
+    "reviews": [
+        IndexModel([("provider_id", ASCENDING)], name="provider_id"),
+    ],
+    "payments": [
+        IndexModel([("order_id", ASCENDING)], name="order_id"),
+        # Unique so concurrent requests with the same Idempotency-Key cannot both create an order
+        IndexModel([("user_id", ASCENDING), ("idempotency_key", ASCENDING)], name="user_idempotency_key_unique",
+                   unique=True, partialFilterExpression={"idempotency_key": {"$type": "string"}}),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "subscriptions": [
+        IndexModel([("user_id", ASCENDING), ("is_active", ASCENDING), ("end_date", DESCENDING)],
+                   name="user_active_end_date"),
+        IndexModel([("is_active", ASCENDING), ("end_date", ASCENDING)], name="active_end_date"),
+    ],
+    "invalidations": [
+        IndexModel([("at", ASCENDING)], name="at"),
+        # Entries are only needed while the state they retire could still be cached
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Representative shapes of the queries issued by server.py, used by index_usage_report().
+QUERY_SHAPES = [
+    ("register/login: user by email", "users", {"email": "x"}, None),
+    ("startup: admin lookup", "users", {"role": "admin"}, None),
+    ("provider profile by user", "provider_profiles", {"user_id": "x"}, None),
+    ("admin providers page", "provider_profiles", {}, [("created_at", -1), ("_id", -1)]),
+    ("admin providers by status", "provider_profiles", {"status": "pending"},
+     [("created_at", -1), ("_id", -1)]),
+    ("admin users page", "users", {}, [("created_at", -1), ("_id", -1)]),
+    ("admin users export by role", "users",
+     {"role": "customer", "created_at": {"$gte": "2025-01-01T00:00:00+00:00"}}, [("created_at", -1), ("_id", -1)]),
+    ("services page", "services", {}, [("created_at", -1), ("_id", -1)]),
+    ("services by category", "services", {"category_id": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("services by provider", "services", {"provider_id": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("bookings by customer", "bookings", {"customer_id": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("bookings by provider", "bookings", {"provider_id": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("completed bookings by provider", "bookings", {"provider_id": "x", "status": "completed"}, None),
+    ("provider availability", "provider_slots",
+     {"provider_id": "x", "slot_start": {"$gte": "2025-01-01T00:00:00+00:00"}}, None),
+    ("slots of a booking", "provider_slots", {"booking_id": "x"}, None),
+    ("reviews by provider", "reviews", {"provider_id": "x"}, None),
+    ("payment by order", "payments", {"order_id": "x"}, None),
+    ("successful payments", "payments", {"status": "success"}, None),
+    ("active subscription", "subscriptions",
+     {"user_id": "x", "is_active": True, "end_date": {"$gte": "2025-01-01T00:00:00+00:00"}}, None),
+    ("subscription expiry job", "subscriptions",
+     {"is_active": True, "end_date": {"$lt": "2025-01-01T00:00:00+00:00"}}, None),
+]
+
+
+async def ensure_indexes(db):
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. duplicate emails blocking the unique index; keep going with the rest
+            logger.error(f"Could not create indexes on {collection}: {e}")
+    logger.info("Indexes ensured")
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def index_usage_report(db):
+    """Explain each known query shape and return the ones whose winning plan is a COLLSCAN."""
+    collection_scans = []
+    for label, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = set(_plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        if "COLLSCAN" in stages:
+            collection_scans.append({"query": label, "collection": collection, "filter": query})
+            logger.warning(f"COLLSCAN: {label} on {collection} {query}")
+    if not collection_scans:
+        logger.info("Index usage report: every known query is served by an index")
+    return collection_scans
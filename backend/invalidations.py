@@ -0,0 +1,67 @@
+import asyncio
+import inspect
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every poll re-reads this much history, so entries written by a worker whose clock runs
+# behind, or that became visible late on a lagging read, are still picked up
+LOOKBACK_SECONDS = 60
+
+
+class InvalidationFeed:
+    """Per-worker caches kept in step through the ``invalidations`` collection.
+
+    A worker that changes shared state publishes ``(kind, key)``; it applies the
+    entry at once and every other worker applies it on its next poll. Handlers
+    must be idempotent, since overlapping polls deliver an entry more than once.
+    Each entry carries its own ``expires_at`` (a TTL index removes it) and the
+    first poll of a worker reads every live entry, so a revocation published
+    before the worker started still applies to it.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable] = {}
+        self._since: Optional[datetime] = None
+
+    def register(self, kind: str, handler: Callable):
+        """Call ``handler(key, ttl_seconds)`` for each entry of ``kind``; it may be a coroutine function."""
+        self._handlers[kind] = handler
+
+    async def _apply(self, kind: str, key: str, ttl: float):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            return
+        result = handler(key, ttl)
+        if inspect.isawaitable(result):
+            await result
+
+    async def publish(self, db, kind: str, key: str, ttl: float = LOOKBACK_SECONDS * 2):
+        """Apply here, then share with the other workers for ``ttl`` seconds."""
+        await self._apply(kind, key, ttl)
+        now = datetime.now(timezone.utc)
+        await db.invalidations.insert_one(
+            {"kind": kind, "key": key, "at": now, "expires_at": now + timedelta(seconds=ttl)}
+        )
+
+    async def poll(self, db):
+        started = datetime.now(timezone.utc)
+        query = {"expires_at": {"$gt": started}}
+        if self._since is not None:
+            query["at"] = {"$gte": self._since - timedelta(seconds=LOOKBACK_SECONDS)}
+        async for doc in db.invalidations.find(query, {"_id": 0, "kind": 1, "key": 1, "expires_at": 1}):
+            expires_at = doc["expires_at"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            await self._apply(doc["kind"], doc["key"], (expires_at - started).total_seconds())
+        self._since = started
+
+    async def run(self, db, interval: float):
+        while True:
+            try:
+                await self.poll(db)
+            except Exception as e:
+                logger.error(f"Invalidation poll failed: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Lease stored in the ``locks`` collection so one worker across all processes and hosts wins.
+
+    ``acquire`` succeeds when the lease is free, expired or already held by this
+    owner (which renews it). A worker that dies keeps the lease only until ``ttl``.
+    """
+
+    def __init__(self, db, name: str, ttl: float):
+        self.db = db
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.locks.update_one(
+                {"_id": self.name, "$or": [{"expires_at": {"$lt": now.isoformat()}}, {"owner": self.owner}]},
+                {"$set": {
+                    "owner": self.owner,
+                    "acquired_at": now.isoformat(),
+                    "expires_at": (now + timedelta(seconds=self.ttl)).isoformat(),
+                    "completed_at": None
+                }},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def complete(self):
+        """Keep the lease until it expires but let waiting workers know the work is done."""
+        await self.db.locks.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"completed_at": datetime.now(timezone.utc).isoformat()}}
+        )
+
+    async def release(self):
+        await self.db.locks.delete_one({"_id": self.name, "owner": self.owner})
+
+    async def wait(self, timeout: float, poll_interval: float = 0.5) -> bool:
+        """Wait until the current holder completes, releases or loses the lease."""
+        deadline = asyncio.get_running_loop().time() + timeout
+        lock = None
+        while asyncio.get_running_loop().time() < deadline:
+            lock = await self.db.locks.find_one({"_id": self.name})
+            if not lock or lock.get("completed_at") or lock["expires_at"] < datetime.now(timezone.utc).isoformat():
+                return True
+            await asyncio.sleep(poll_interval)
+        logger.warning(f"Timed out after {timeout}s waiting for lock {self.name} held by {lock and lock['owner']}")
+        return False
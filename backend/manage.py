@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import logging
+
+from pymongo import UpdateMany, UpdateOne
+
+from availability import backfill_booking_slots
+from earnings import rebuild_provider_earnings
+from indexes import ensure_indexes, index_usage_report
+from server import db, client, slot_calendar
+from stats import reconcile_stats
+
+logger = logging.getLogger("manage")
+
+
+async def backfill_rating_counters():
+    totals = await db.reviews.aggregate([
+        {"$group": {
+            "_id": "$provider_id",
+            "rating_sum": {"$sum": "$rating"},
+            "rating_count": {"$sum": 1}
+        }}
+    ]).to_list(None)
+
+    profile_ops = []
+    service_ops = []
+    for t in totals:
+        rating = t["rating_sum"] / t["rating_count"]
+        profile_ops.append(UpdateOne(
+            {"user_id": t["_id"]},
+            {"$set": {"rating_sum": t["rating_sum"], "rating_count": t["rating_count"], "rating": rating}}
+        ))
+        service_ops.append(UpdateMany(
+            {"provider_id": t["_id"]},
+            {"$set": {"rating": rating, "reviews_count": t["rating_count"]}}
+        ))
+
+    reviewed = [t["_id"] for t in totals]
+    await db.provider_profiles.update_many(
+        {"user_id": {"$nin": reviewed}},
+        {"$set": {"rating_sum": 0, "rating_count": 0, "rating": 0.0}}
+    )
+    if profile_ops:
+        await db.provider_profiles.bulk_write(profile_ops, ordered=False)
+        await db.services.bulk_write(service_ops, ordered=False)
+    logger.info(f"Rating counters rebuilt for {len(totals)} providers")
+
+
+async def backfill_provider_earnings():
+    await rebuild_provider_earnings(db)
+
+
+async def backfill_slots():
+    await backfill_booking_slots(db, slot_calendar)
+
+
+async def create_indexes():
+    await ensure_indexes(db)
+
+
+async def report_index_usage():
+    await index_usage_report(db)
+
+
+async def reconcile_admin_stats():
+    await reconcile_stats(db)
+
+
+COMMANDS = {
+    "backfill-earnings": backfill_provider_earnings,
+    "backfill-ratings": backfill_rating_counters,
+    "backfill-slots": backfill_slots,
+    "ensure-indexes": create_indexes,
+    "index-report": report_index_usage,
+    "reconcile-stats": reconcile_admin_stats,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endless Path maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await COMMANDS[args.command]()
+        finally:
+            client.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
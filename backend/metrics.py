@@ -0,0 +1,176 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Optional
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_CALL_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_format(total)}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.value}"
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route template.",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+REQUEST_MONGO_CALLS = Histogram(
+    "http_request_mongo_calls", "MongoDB commands issued while handling one request.",
+    ("method", "route"), MONGO_CALL_BUCKETS
+)
+REQUEST_MONGO_DURATION = Histogram(
+    "http_request_mongo_seconds", "Time spent in MongoDB round trips while handling one request.",
+    ("method", "route"), LATENCY_BUCKETS
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time by command and outcome.",
+    ("command", "outcome"), LATENCY_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being handled by this worker.")
+METRICS = (REQUEST_DURATION, REQUEST_MONGO_CALLS, REQUEST_MONGO_DURATION, MONGO_COMMAND_DURATION, REQUESTS_IN_PROGRESS)
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+class RequestTiming:
+    __slots__ = ("mongo_calls", "mongo_seconds")
+
+    def __init__(self):
+        self.mongo_calls = 0
+        self.mongo_seconds = 0.0
+
+
+_current_timing: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("request_timing", default=None)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every MongoDB command and charges it to the request that issued it.
+
+    Motor runs driver calls on its executor inside a copy of the caller's
+    context, so the request's RequestTiming is visible from these callbacks.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+    def _record(self, event, outcome: str):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_DURATION.observe((event.command_name, outcome), seconds)
+        timing = _current_timing.get()
+        if timing is not None:
+            timing.mongo_calls += 1
+            timing.mongo_seconds += seconds
+
+
+class MetricsMiddleware:
+    """Records latency and Mongo usage per route template; optionally reports them in Server-Timing."""
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(raw=list(message.get("headers", [])))
+                    headers.append("Server-Timing", (
+                        f"app;dur={(time.perf_counter() - started) * 1000:.1f}, "
+                        f'mongo;dur={timing.mongo_seconds * 1000:.1f};desc="{timing.mongo_calls} calls"'
+                    ))
+                    message["headers"] = headers.raw
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.value += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_PROGRESS.value -= 1
+            _current_timing.reset(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_DURATION.observe((method, route_label, f"{status_code // 100}xx"), time.perf_counter() - started)
+            REQUEST_MONGO_CALLS.observe((method, route_label), timing.mongo_calls)
+            REQUEST_MONGO_DURATION.observe((method, route_label), timing.mongo_seconds)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, field_validator, model_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -73,6 +73,14 @@ class ServiceCreate(BaseModel):
     price: float
     duration_minutes: int
     location: str
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def check_coordinates(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
 
 class ServiceResponse(BaseModel):
     id: str
@@ -87,13 +95,27 @@ class ServiceResponse(BaseModel):
     location: str
     rating: float = 0.0
     reviews_count: int = 0
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: str
 
+class NearbyServiceResponse(ServiceResponse):
+    distance_m: float
+
 class BookingCreate(BaseModel):
     service_id: str
     scheduled_date: str
     notes: Optional[str] = None
 
+    @field_validator("scheduled_date")
+    @classmethod
+    def check_scheduled_date(cls, value):
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError("scheduled_date must be an ISO 8601 date and time")
+        return value
+
 class BookingResponse(BaseModel):
     id: str
     customer_id: str
@@ -0,0 +1,60 @@
+import base64
+import json
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Newest first; _id breaks ties between documents created in the same instant
+PAGE_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def projection_for(model: type[BaseModel], *extra: str) -> dict:
+    """Mongo projection with just the fields a response model needs (``id`` comes from ``_id``)."""
+    fields = [name for name in model.model_fields if name != "id"]
+    return {name: 1 for name in [*fields, "created_at", *extra]}
+
+
+def encode_cursor(doc: dict) -> str:
+    doc_id = doc["_id"]
+    payload = {"c": doc.get("created_at"), "i": str(doc_id), "o": isinstance(doc_id, ObjectId)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        doc_id = ObjectId(payload["i"]) if payload["o"] else payload["i"]
+        return payload["c"], doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_cursor(query: dict, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": doc_id}}
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+async def fetch_page(collection, query: dict, limit: int, cursor: Optional[str] = None,
+                     projection: Optional[dict] = None):
+    """Return one page of documents plus the cursor for the next page (None on the last page).
+
+    A projection must keep ``_id`` and ``created_at`` so the next cursor can be built.
+    """
+    docs = await collection.find(apply_cursor(query, cursor), projection) \
+        .sort(PAGE_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PaymentGatewayError(Exception):
+    pass
+
+
+class CircuitOpenError(PaymentGatewayError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one trial call through once reset_timeout has passed.
+
+    While half-open only a single probe is in flight; everyone else is refused
+    until it reports back. A probe that never does (e.g. a cancelled request)
+    frees the slot after another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half_open":
+            return state == "closed"
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probe_started_at = None
+        if self.failures >= self.failure_threshold or self.state == "half_open":
+            self.opened_at = time.monotonic()
+
+
+def _signature(secret: str, order_id: str, payment_id: str) -> str:
+    return hmac.new(secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+class RazorpayGateway:
+    """Async Razorpay Orders client on a pooled httpx connection.
+
+    The idempotency key is sent as the order receipt. Before retrying a call
+    whose outcome is unknown (timeout or 5xx), the gateway looks the receipt
+    up so a retry never creates a second order.
+    """
+
+    def __init__(self, key_id: str, key_secret: str, base_url: str = "https://api.razorpay.com/v1",
+                 timeout: float = 10.0, connect_timeout: float = 3.0, max_retries: int = 2,
+                 backoff: float = 0.2, max_connections: int = 20,
+                 breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(key_id, key_secret),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def _find_order_by_receipt(self, receipt: str) -> Optional[dict]:
+        response = await self._client.get("/orders", params={"receipt": receipt})
+        response.raise_for_status()
+        items = response.json().get("items", [])
+        return items[0] if items else None
+
+    async def create_order(self, amount: int, currency: str, idempotency_key: str) -> dict:
+        if not self.breaker.allow():
+            raise CircuitOpenError("Payment gateway circuit is open")
+        payload = {"amount": amount, "currency": currency, "receipt": idempotency_key, "payment_capture": 1}
+        last_error: Exception = PaymentGatewayError("Order creation failed")
+        for attempt in range(self.max_retries + 1):
+            try:
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                    existing = await self._find_order_by_receipt(idempotency_key)
+                    if existing:
+                        self.breaker.record_success()
+                        return existing
+                response = await self._client.post("/orders", json=payload)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = PaymentGatewayError(f"Gateway returned {response.status_code}")
+                    continue
+                if response.is_error:
+                    # The request itself was rejected; retrying cannot help and the gateway is healthy
+                    self.breaker.record_success()
+                    raise PaymentGatewayError(f"Gateway rejected order: {response.text}")
+                self.breaker.record_success()
+                return response.json()
+            except httpx.HTTPError as e:
+                last_error = e
+                logger.warning(f"Razorpay order attempt {attempt + 1} failed: {e}")
+        self.breaker.record_failure()
+        raise PaymentGatewayError(str(last_error))
+
+    def verify_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        return hmac.compare_digest(_signature(self.key_secret, order_id, payment_id), signature)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class StubGateway:
+    """In-memory gateway for local development and tests; signatures use the same HMAC scheme."""
+
+    def __init__(self, key_id: str = "rzp_test_stub", key_secret: str = "stub_secret", delay: float = 0.0):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.delay = delay
+        self.breaker = CircuitBreaker()
+        self.orders = {}
+
+    async def create_order(self, amount: int, currency: str, idempotency_key: str) -> dict:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if idempotency_key not in self.orders:
+            self.orders[idempotency_key] = {
+                "id": f"order_stub_{uuid.uuid4().hex[:14]}",
+                "amount": amount,
+                "currency": currency,
+                "receipt": idempotency_key,
+            }
+        return self.orders[idempotency_key]
+
+    def sign(self, order_id: str, payment_id: str) -> str:
+        return _signature(self.key_secret, order_id, payment_id)
+
+    def verify_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        return hmac.compare_digest(self.sign(order_id, payment_id), signature)
+
+    async def close(self) -> None:
+        pass
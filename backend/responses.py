@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from pagination import NEXT_CURSOR_HEADER
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson rendering; values orjson cannot encode natively (ObjectId, Decimal128) are stringified."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def response_fields(model: type[BaseModel]) -> tuple:
+    """(name, default) for every field of a response model except ``id``; required fields default to None."""
+    return tuple(
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items() if name != "id"
+    )
+
+
+def serialize_documents(model: type[BaseModel], docs: Iterable[dict]) -> list:
+    """Shape projected Mongo documents like ``model`` without building or re-validating model instances.
+
+    Documents are written by this API, so their fields already have the
+    model's types; only ``_id`` needs converting and missing fields defaulting.
+    """
+    fields = response_fields(model)
+    return [{"id": str(doc["_id"]), **{name: doc.get(name, default) for name, default in fields}} for doc in docs]
+
+
+def list_response(model: type[BaseModel], docs: Iterable[dict], next_cursor: Optional[str] = None,
+                  headers: Optional[dict] = None) -> FastJSONResponse:
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(serialize_documents(model, docs), headers=headers)
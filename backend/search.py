@@ -0,0 +1,131 @@
+from bisect import bisect_left
+from itertools import islice
+from typing import Dict, List, Optional, Set
+import re
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+RANK_WINDOW_FACTOR = 50
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class ServiceSearchIndex:
+    """In-process inverted index over service titles and descriptions.
+
+    Every query term must match; the last term is matched as a prefix so the
+    index can serve typeahead. Services matching every term in their title rank
+    ahead of those that only match through the description.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._by_category: Dict[str, Set[str]] = {}
+        self._docs: Dict[str, dict] = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, service: dict) -> None:
+        service_id = str(service["_id"])
+        if service_id in self._docs:
+            self.remove(service_id)
+        title_tokens = set(tokenize(service.get("title", "")))
+        tokens = title_tokens | set(tokenize(service.get("description", "")))
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                self._vocabulary.insert(bisect_left(self._vocabulary, token), token)
+            postings.add(service_id)
+        self._by_category.setdefault(service.get("category_id"), set()).add(service_id)
+        self._docs[service_id] = {
+            "id": service_id,
+            "title": service.get("title", ""),
+            "category_id": service.get("category_id"),
+            "category_name": service.get("category_name"),
+            "_tokens": tokens,
+            "_title_tokens": title_tokens,
+        }
+
+    def remove(self, service_id: str) -> None:
+        doc = self._docs.pop(service_id, None)
+        if doc is None:
+            return
+        for token in doc["_tokens"]:
+            postings = self._postings[token]
+            postings.discard(service_id)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+        self._by_category[doc["category_id"]].discard(service_id)
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self._postings else []
+        start = bisect_left(self._vocabulary, term)
+        end = bisect_left(self._vocabulary, term + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def _match_term(self, term: str, prefix: bool, candidates: Optional[Set[str]]) -> Set[str]:
+        tokens = self._expand(term, prefix)
+        postings = [self._postings[t] for t in tokens]
+        if candidates is not None and prefix and len(candidates) * 20 < sum(map(len, postings)):
+            # Cheaper to test the few remaining candidates than to union large posting lists
+            return {i for i in candidates if any(t.startswith(term) for t in self._docs[i]["_tokens"])}
+        matches = set().union(*postings)
+        return matches if candidates is None else matches & candidates
+
+    def _in_title(self, service_id: str, terms: List[str]) -> bool:
+        title_tokens = self._docs[service_id]["_title_tokens"]
+        return all(t in title_tokens for t in terms[:-1]) and \
+            any(t.startswith(terms[-1]) for t in title_tokens)
+
+    def search(self, query: str, category_id: Optional[str] = None, limit: int = 20) -> List[str]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Most selective exact terms first, the typeahead prefix last
+        exact = sorted(set(terms[:-1]), key=lambda t: len(self._postings.get(t, ())))
+        matches: Optional[Set[str]] = None
+        for term, prefix in [(t, False) for t in exact] + [(terms[-1], True)]:
+            matches = self._match_term(term, prefix, matches)
+            if not matches:
+                return []
+        if category_id:
+            matches &= self._by_category.get(category_id, set())
+        # Rank title matches first within a bounded window so broad prefixes stay cheap
+        title_hits, other_hits = [], []
+        for service_id in islice(matches, limit * RANK_WINDOW_FACTOR):
+            (title_hits if self._in_title(service_id, terms) else other_hits).append(service_id)
+            if len(title_hits) == limit:
+                break
+        return (title_hits + other_hits)[:limit]
+
+    def suggest(self, query: str, category_id: Optional[str] = None, limit: int = 10) -> List[dict]:
+        return [
+            {"id": d["id"], "title": d["title"], "category_name": d["category_name"]}
+            for d in (self._docs[service_id] for service_id in self.search(query, category_id, limit))
+        ]
+
+
+async def build_service_index(db, batch_size: int = 1000) -> ServiceSearchIndex:
+    index = ServiceSearchIndex()
+    projection = {"title": 1, "description": 1, "category_id": 1, "category_name": 1}
+    async for service in db.services.find({}, projection).batch_size(batch_size):
+        index.add(service)
+    index.ready = True
+    return index
+
+
+async def add_services_since(index: ServiceSearchIndex, db, since: str, batch_size: int = 1000) -> int:
+    """Add services created at or after ``since`` (UTC ISO string); re-adding one already indexed is harmless."""
+    added = 0
+    projection = {"title": 1, "description": 1, "category_id": 1, "category_name": 1}
+    async for service in db.services.find({"created_at": {"$gte": since}}, projection).batch_size(batch_size):
+        index.add(service)
+        added += 1
+    return added
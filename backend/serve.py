@@ -0,0 +1,53 @@
+"""Production entrypoint for the API.
+
+Runs server:app under uvicorn's process supervisor with WEB_CONCURRENCY
+workers, on uvloop/httptools when they are installed, with keep-alive,
+backlog and graceful-shutdown settings taken from the environment:
+
+    PORT=8001 WEB_CONCURRENCY=2 python serve.py
+"""
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    # A small fixed default: the CPU count of a large host would multiply Mongo pools and per-worker caches
+    workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    limit_concurrency = os.environ.get("LIMIT_CONCURRENCY")
+
+    if workers > 1 and os.environ.get("EVENT_BROKER", "memory") != "mongo":
+        logger.warning("EVENT_BROKER=memory with several workers: booking stream clients only "
+                       "see changes handled by the worker they are connected to")
+    logger.info(f"Starting {workers} worker(s) with loop={loop} http={http}")
+
+    uvicorn.run(
+        "server:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8001")),
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=int(os.environ.get("BACKLOG", "2048")),
+        timeout_keep_alive=int(os.environ.get("KEEPALIVE_TIMEOUT_SECONDS", "5")),
+        timeout_graceful_shutdown=int(os.environ.get("GRACEFUL_SHUTDOWN_SECONDS", "20")),
+        limit_concurrency=int(limit_concurrency) if limit_concurrency else None,
+        proxy_headers=True,
+        forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "*"),
+        access_log=os.environ.get("ACCESS_LOG", "false").lower() == "true",
+    )
+
+
+if __name__ == "__main__":
+    main()
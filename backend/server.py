@@ -1,35 +1,95 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pydantic import ValidationError
 from dotenv import load_dotenv
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 import os
+import asyncio
 import logging
-import razorpay
-from typing import List, Optional
+import uuid
+from typing import List, Literal, Optional
 
 from models import (
     UserRegister, UserLogin, UserResponse, UserRole, ProviderStatus, BookingStatus,
-    ServiceCategoryCreate, ServiceCategoryResponse, ServiceCreate, ServiceResponse,
+    ServiceCategoryCreate, ServiceCategoryResponse, ServiceCreate, ServiceResponse, NearbyServiceResponse,
     BookingCreate, BookingResponse, BookingStatusUpdate, ReviewCreate, ReviewResponse,
     SubscriptionCreate, SubscriptionResponse, PaymentCreate, PaymentResponse, PaymentStatus
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token, 
-    get_current_user
+    hash_password, verify_and_update_password, create_access_token, create_stream_token,
+    get_current_user, mark_revoked, password_pool_stats, revoke_token, security, token_cache_stats, verify_token,
+    STREAM_SCOPE, STREAM_TOKEN_EXPIRE_SECONDS
 )
+from cache import TTLCache
+from catalog import CatalogVersion, etag_matches
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, MongoCommandListener, render_metrics
+from indexes import ensure_indexes, index_usage_report
+from invalidations import InvalidationFeed
+from locks import LeaderLock
+from responses import FastJSONResponse, list_response, serialize_documents
+from exports import EXPORT_BATCH_SIZE, MAX_REPORTED_ERRORS, export_response, iter_import_rows, request_format
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, fetch_page, projection_for
+from geo import MAX_RADIUS_M, fetch_nearby, geo_point
+from availability import MAX_AVAILABILITY_DAYS, RELEASED_STATUSES, SlotCalendar
+from search import ServiceSearchIndex, add_services_since, build_service_index
+from analytics import MAX_BUCKETS, RollupAggregator, bucket_count, read_series
+from events import booking_event, create_broker, sse_events
+from earnings import completion_delta, monthly_series
+from stats import get_stats, increment_stats, reconcile_stats, STATS_ID
+from payments import CircuitBreaker, CircuitOpenError, PaymentGatewayError, RazorpayGateway, StubGateway
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    maxIdleTimeMS=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+    waitQueueTimeoutMS=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    connectTimeoutMS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    compressors=os.environ.get('MONGO_COMPRESSORS', 'zstd,zlib'),
+    event_listeners=[MongoCommandListener()]
+)
 db = client[os.environ['DB_NAME']]
+# Catalog and analytics reads tolerate replication lag, so they may be served by secondaries;
+# bookings, payments, credits and anything read back right after a write stay on db (primary).
+# So do the catalog reads answered under a version ETag or cached by version: data a secondary
+# has not caught up on must never be labelled with a version this worker already knows about
+if os.environ.get('CATALOG_READ_PREFERENCE', 'secondaryPreferred') == 'secondaryPreferred':
+    catalog_max_staleness = int(os.environ.get('CATALOG_MAX_STALENESS_SECONDS', '-1'))
+    catalog_read_preference = SecondaryPreferred(max_staleness=catalog_max_staleness)
+else:
+    catalog_read_preference = Primary()
+catalog_db = client.get_database(os.environ['DB_NAME'], read_preference=catalog_read_preference)
 
 razorpay_key_id = os.environ.get('RAZORPAY_KEY_ID', 'rzp_test_1DP5mmOlF5G5ag')
 razorpay_key_secret = os.environ.get('RAZORPAY_KEY_SECRET', 'TEST_SECRET')
-razorpay_client = razorpay.Client(auth=(razorpay_key_id, razorpay_key_secret))
+if os.environ.get('PAYMENT_GATEWAY', 'razorpay') == 'stub':
+    payment_gateway = StubGateway(razorpay_key_id, razorpay_key_secret)
+else:
+    payment_gateway = RazorpayGateway(
+        razorpay_key_id,
+        razorpay_key_secret,
+        timeout=float(os.environ.get('RAZORPAY_TIMEOUT_SECONDS', '10')),
+        connect_timeout=float(os.environ.get('RAZORPAY_CONNECT_TIMEOUT_SECONDS', '3')),
+        max_retries=int(os.environ.get('RAZORPAY_MAX_RETRIES', '2')),
+        max_connections=int(os.environ.get('RAZORPAY_MAX_CONNECTIONS', '20')),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.environ.get('RAZORPAY_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.environ.get('RAZORPAY_BREAKER_RESET_SECONDS', '30'))
+        )
+    )
 
 app = FastAPI(title="Endless Path API")
 api_router = APIRouter(prefix="/api")
@@ -37,6 +97,66 @@ api_router = APIRouter(prefix="/api")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STARTUP_LOCK_TTL_SECONDS = float(os.environ.get('STARTUP_LOCK_TTL_SECONDS', '120'))
+ENSURE_INDEXES_ON_STARTUP = os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+INDEX_USAGE_REPORT = os.environ.get('INDEX_USAGE_REPORT', 'false').lower() == 'true'
+CATEGORY_CACHE_TTL_SECONDS = float(os.environ.get('CATEGORY_CACHE_TTL_SECONDS', '300'))
+# Keyed by catalog version, so a write on any worker retires the cached catalog everywhere
+category_cache = TTLCache(ttl=CATEGORY_CACHE_TTL_SECONDS, maxsize=1)
+catalog_version = CatalogVersion()
+CATALOG_VERSION_REFRESH_SECONDS = float(os.environ.get('CATALOG_VERSION_REFRESH_SECONDS', '2'))
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={int(os.environ.get('CATALOG_CACHE_MAX_AGE_SECONDS', '60'))}, "
+    f"stale-while-revalidate={int(os.environ.get('CATALOG_STALE_WHILE_REVALIDATE_SECONDS', '300'))}"
+)
+DEBUG = os.environ.get('DEBUG', 'false').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', '1024'))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '5'))
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))
+SEARCH_INDEX_REFRESH_SECONDS = float(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', '300'))
+search_index = ServiceSearchIndex()
+# Services created on other workers reach this worker's index within one catalog version poll
+SEARCH_INDEX_LOOKBACK_SECONDS = 60
+SUBSCRIPTION_CACHE_SIZE = int(os.environ.get('SUBSCRIPTION_CACHE_SIZE', '10000'))
+SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS = float(os.environ.get('SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS', '300'))
+# user_id -> active subscription, expiring exactly at its end_date (every entry sets its own TTL).
+# "No subscription" is never cached: a purchase handled by another worker must be seen at once.
+subscription_cache = TTLCache(ttl=0, maxsize=SUBSCRIPTION_CACHE_SIZE)
+STATS_RECONCILE_INTERVAL_SECONDS = float(os.environ.get('STATS_RECONCILE_INTERVAL_SECONDS', '3600'))
+ANALYTICS_FLUSH_INTERVAL_SECONDS = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL_SECONDS', '5'))
+rollups = RollupAggregator()
+EARNINGS_CACHE_TTL_SECONDS = float(os.environ.get('EARNINGS_CACHE_TTL_SECONDS', '300'))
+EARNINGS_CACHE_SIZE = int(os.environ.get('EARNINGS_CACHE_SIZE', '10000'))
+# provider user_id -> earnings fields of the provider profile
+earnings_cache = TTLCache(ttl=EARNINGS_CACHE_TTL_SECONDS, maxsize=EARNINGS_CACHE_SIZE)
+INVALIDATION_POLL_SECONDS = float(os.environ.get('INVALIDATION_POLL_SECONDS', '2'))
+# Logouts and earnings changes reach the other workers' caches within one poll
+invalidations = InvalidationFeed()
+invalidations.register("revoked_token", mark_revoked)
+invalidations.register("earnings", lambda provider_id, ttl: earnings_cache.invalidate(provider_id))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+# "memory" delivers within one worker; "mongo" shares events between workers through a capped collection
+event_broker = create_broker(
+    os.environ.get('EVENT_BROKER', 'memory'),
+    queue_size=int(os.environ.get('EVENT_QUEUE_SIZE', '100')),
+    size_bytes=int(os.environ.get('EVENT_COLLECTION_SIZE_BYTES', str(16 * 1024 * 1024)))
+)
+optional_security = HTTPBearer(auto_error=False)
+# Bookings reserve every slot their service's duration overlaps; availability is offered within the working day
+slot_calendar = SlotCalendar(
+    slot_minutes=int(os.environ.get('SLOT_MINUTES', '30')),
+    day_start_hour=int(os.environ.get('AVAILABILITY_DAY_START_HOUR', '8')),
+    day_end_hour=int(os.environ.get('AVAILABILITY_DAY_END_HOUR', '20')),
+    tz=os.environ.get('BOOKING_TIMEZONE', 'Asia/Kolkata')
+)
+background_tasks = []
+
+SERVICE_PROJECTION = projection_for(ServiceResponse)
+BOOKING_PROJECTION = projection_for(BookingResponse)
+USER_PROJECTION = projection_for(UserResponse)
+USER_PROJECTION.pop("provider_status")
+
 @api_router.post("/auth/register", response_model=UserResponse)
 async def register(user_data: UserRegister):
     existing_user = await db.users.find_one({"email": user_data.email})
@@ -45,7 +165,7 @@ async def register(user_data: UserRegister):
     
     user_dict = {
         "email": user_data.email,
-        "password": get_password_hash(user_data.password),
+        "password": await hash_password(user_data.password),
         "full_name": user_data.full_name,
         "phone": user_data.phone,
         "role": user_data.role,
@@ -54,7 +174,11 @@ async def register(user_data: UserRegister):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        # A concurrent registration with the same email won the email_unique index
+        raise HTTPException(status_code=400, detail="Email already registered")
     user_id = str(result.inserted_id)
     
     if user_data.role == UserRole.PROVIDER:
@@ -65,11 +189,17 @@ async def register(user_data: UserRegister):
             "description": user_data.description or "",
             "status": ProviderStatus.PENDING,
             "rating": 0.0,
+            "rating_sum": 0,
+            "rating_count": 0,
             "total_earnings": 0.0,
             "completed_jobs": 0,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.provider_profiles.insert_one(provider_profile)
+        await increment_stats(db, total_users=1, total_providers=1, pending_approvals=1)
+    else:
+        await increment_stats(db, total_users=1)
+    rollups.user_registered(user_data.role)
     
     return UserResponse(
         id=user_id,
@@ -86,8 +216,13 @@ async def register(user_data: UserRegister):
 @api_router.post("/auth/login")
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password(credentials.password, user["password"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
     
     if not user.get("is_active", True):
         raise HTTPException(status_code=403, detail="Account is inactive")
@@ -118,6 +253,14 @@ async def login(credentials: UserLogin):
         }
     }
 
+@api_router.post("/auth/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    revocation = revoke_token(credentials.credentials)
+    if revocation:
+        digest, remaining = revocation
+        await invalidations.publish(db, "revoked_token", digest, ttl=remaining)
+    return {"status": "logged out"}
+
 @api_router.get("/auth/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
     from bson import ObjectId
@@ -160,24 +303,37 @@ async def create_category(
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     result = await db.categories.insert_one(category_dict)
+    await catalog_version.bump(db)
     return ServiceCategoryResponse(id=str(result.inserted_id), **category_data.dict())
 
+def catalog_headers(etag: Optional[str]) -> dict:
+    headers = {"Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
 @api_router.get("/categories", response_model=List[ServiceCategoryResponse])
-async def get_categories():
+async def get_categories(if_none_match: Optional[str] = Header(None)):
+    version = catalog_version.value
+    etag = catalog_version.etag("categories")
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=catalog_headers(etag))
+    cached = category_cache.get(version)
+    if cached is not None:
+        return FastJSONResponse(cached, headers=catalog_headers(etag))
+    
     categories = await db.categories.find({}).to_list(100)
-    result = []
+    counts = await db.services.aggregate([
+        {"$group": {"_id": "$category_id", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    service_counts = {c["_id"]: c["count"] for c in counts}
+    
     for cat in categories:
-        cat_id = str(cat["_id"])
-        service_count = await db.services.count_documents({"category_id": cat_id})
-        result.append(ServiceCategoryResponse(
-            id=cat_id,
-            name=cat["name"],
-            description=cat["description"],
-            icon=cat.get("icon"),
-            service_count=service_count,
-            sub_services=cat.get("sub_services", [])
-        ))
-    return result
+        cat["service_count"] = service_counts.get(str(cat["_id"]), 0)
+        cat.setdefault("sub_services", [])
+    result = serialize_documents(ServiceCategoryResponse, categories)
+    category_cache.set(version, result)
+    return FastJSONResponse(result, headers=catalog_headers(etag))
 
 @api_router.post("/services", response_model=ServiceResponse)
 async def create_service(
@@ -198,68 +354,239 @@ async def create_service(
         "provider_id": current_user["sub"],
         "provider_name": user["full_name"],
         "category_name": category["name"] if category else "Unknown",
-        "rating": 0.0,
-        "reviews_count": 0,
+        "rating": provider.get("rating", 0.0),
+        "reviews_count": provider.get("rating_count", 0),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
+    if service_data.latitude is not None:
+        service_dict["geo"] = geo_point(service_data.latitude, service_data.longitude)
     
     result = await db.services.insert_one(service_dict)
+    await catalog_version.bump(db)
+    search_index.add({"_id": result.inserted_id, **service_dict})
     return ServiceResponse(id=str(result.inserted_id), **service_dict)
 
-@api_router.get("/services", response_model=List[ServiceResponse])
-async def get_services(category_id: Optional[str] = None, search: Optional[str] = None):
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+@api_router.post("/services/import")
+async def import_services(
+    request: Request,
+    fmt: Optional[Literal["ndjson", "csv"]] = Query(None, alias="format"),
+    provider_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") == UserRole.PROVIDER:
+        if provider_id and provider_id != current_user["sub"]:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        provider_id = current_user["sub"]
+    elif current_user.get("role") == UserRole.ADMIN:
+        if not provider_id:
+            raise HTTPException(status_code=400, detail="provider_id is required")
+    else:
+        raise HTTPException(status_code=403, detail="Provider access required")
+    
+    # Everything a row needs besides its own fields is resolved once for the whole import
+    provider = await db.provider_profiles.find_one(
+        {"user_id": provider_id}, {"status": 1, "rating": 1, "rating_count": 1}
+    )
+    if not provider or provider.get("status") != ProviderStatus.APPROVED:
+        raise HTTPException(status_code=403, detail="Provider not approved yet")
+    from bson import ObjectId
+    try:
+        provider_obj_id = ObjectId(provider_id)
+    except:
+        provider_obj_id = provider_id
+    user = await db.users.find_one({"_id": provider_obj_id}, {"full_name": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    categories = {str(c["_id"]): c["name"] for c in await db.categories.find({}, {"name": 1}).to_list(None)}
+    provider_fields = {
+        "provider_id": provider_id,
+        "provider_name": user["full_name"],
+        "rating": provider.get("rating", 0.0),
+        "reviews_count": provider.get("rating_count", 0)
+    }
+    
+    inserted = failed = 0
+    errors = []
+    batch = []
+    
+    def reject(row_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "error": message})
+    
+    async def flush():
+        nonlocal inserted
+        if not batch:
+            return
+        failed_rows = set()
+        try:
+            await db.services.insert_many([doc for _, doc in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed_rows.add(write_error["index"])
+                reject(batch[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+        for i, (_, doc) in enumerate(batch):
+            if i not in failed_rows:
+                inserted += 1
+                search_index.add(doc)
+        batch.clear()
+    
+    async for row_number, row in iter_import_rows(request.stream(), request_format(fmt, request.headers.get("content-type"))):
+        if isinstance(row, str):
+            reject(row_number, row)
+            continue
+        try:
+            service_data = ServiceCreate(**row)
+        except ValidationError as e:
+            reject(row_number, _validation_message(e))
+            continue
+        if service_data.category_id not in categories:
+            reject(row_number, f"Unknown category_id {service_data.category_id}")
+            continue
+        service_dict = {
+            **service_data.dict(),
+            **provider_fields,
+            "category_name": categories[service_data.category_id],
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        if service_data.latitude is not None:
+            service_dict["geo"] = geo_point(service_data.latitude, service_data.longitude)
+        batch.append((row_number, service_dict))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    await flush()
+    
+    if inserted:
+        await catalog_version.bump(db)
+    return {"inserted": inserted, "failed": failed, "errors": errors, "errors_truncated": failed > len(errors)}
+
+@api_router.get("/services/export")
+async def export_services(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    provider_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") == UserRole.PROVIDER:
+        if provider_id and provider_id != current_user["sub"]:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        provider_id = current_user["sub"]
+    elif current_user.get("role") != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Provider access required")
+    
     query = {}
+    if provider_id:
+        query["provider_id"] = provider_id
     if category_id:
         query["category_id"] = category_id
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}}
-        ]
+    # Streams in created_at order straight off the page indexes, one cursor batch at a time
+    cursor = catalog_db.services.find(query, SERVICE_PROJECTION, batch_size=EXPORT_BATCH_SIZE) \
+        .sort([("created_at", -1), ("_id", -1)])
+    return export_response(cursor, ServiceResponse, fmt, "services")
+
+async def _find_services_by_ids(service_ids: List[str]):
+    from bson import ObjectId
+    lookup_ids = service_ids + [ObjectId(i) for i in service_ids if ObjectId.is_valid(i)]
+    services = await catalog_db.services.find({"_id": {"$in": lookup_ids}}, SERVICE_PROJECTION).to_list(None)
+    rank = {service_id: i for i, service_id in enumerate(service_ids)}
+    return sorted(services, key=lambda s: rank[str(s["_id"])])
+
+async def _search_services(search: str, category_id: Optional[str], search_mode: str, limit: int):
+    if search_mode == "prefix" and search_index.ready:
+        return await _find_services_by_ids(search_index.search(search, category_id, limit))
     
-    services = await db.services.find(query).to_list(100)
-    result = []
-    for s in services:
-        result.append(ServiceResponse(
-            id=str(s["_id"]),
-            provider_id=s["provider_id"],
-            provider_name=s["provider_name"],
-            title=s["title"],
-            description=s["description"],
-            category_id=s["category_id"],
-            category_name=s["category_name"],
-            price=s["price"],
-            duration_minutes=s["duration_minutes"],
-            location=s["location"],
-            rating=s.get("rating", 0.0),
-            reviews_count=s.get("reviews_count", 0),
-            created_at=s["created_at"]
-        ))
-    return result
+    query = {"$text": {"$search": search}}
+    if category_id:
+        query["category_id"] = category_id
+    try:
+        return await catalog_db.services.find(query, {**SERVICE_PROJECTION, "score": {"$meta": "textScore"}}) \
+            .sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(limit)
+    except OperationFailure as e:
+        if not search_index.ready:
+            raise HTTPException(status_code=503, detail="Search is temporarily unavailable")
+        logger.warning(f"Text search failed, falling back to in-process index: {e}")
+        return await _find_services_by_ids(search_index.search(search, category_id, limit))
+
+@api_router.get("/services", response_model=List[ServiceResponse])
+async def get_services(
+    category_id: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: Literal["text", "prefix"] = "text",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None)
+):
+    next_cursor = None
+    if search:
+        # Search results are relevance-ranked, so only the top `limit` are returned. Prefix search
+        # reads the periodically rebuilt in-process index, so it gets no version-based ETag
+        etag = None
+        services = await _search_services(search, category_id, search_mode, limit)
+    else:
+        etag = catalog_version.etag("services")
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=catalog_headers(etag))
+        query = {"category_id": category_id} if category_id else {}
+        services, next_cursor = await fetch_page(db.services, query, limit, cursor, SERVICE_PROJECTION)
+    return list_response(ServiceResponse, services, next_cursor, headers=catalog_headers(etag))
+
+@api_router.get("/services/nearby", response_model=List[NearbyServiceResponse])
+async def get_nearby_services(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(5000, gt=0, le=MAX_RADIUS_M, description="metres"),
+    category_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None)
+):
+    etag = catalog_version.etag("nearby")
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=catalog_headers(etag))
+    services, next_cursor = await fetch_nearby(
+        db.services, lat, lng, radius, category_id, limit, cursor, SERVICE_PROJECTION
+    )
+    return list_response(NearbyServiceResponse, services, next_cursor, headers=catalog_headers(etag))
+
+@api_router.get("/services/suggest")
+async def suggest_services(
+    q: str,
+    category_id: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50)
+):
+    return search_index.suggest(q, category_id, limit)
 
 @api_router.get("/services/provider/me", response_model=List[ServiceResponse])
-async def get_my_services(current_user: dict = Depends(get_current_user)):
+async def get_my_services(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user.get("role") != UserRole.PROVIDER:
         raise HTTPException(status_code=403, detail="Provider access required")
-    services = await db.services.find({"provider_id": current_user["sub"]}).to_list(100)
-    result = []
-    for s in services:
-        result.append(ServiceResponse(
-            id=str(s["_id"]),
-            provider_id=s["provider_id"],
-            provider_name=s["provider_name"],
-            title=s["title"],
-            description=s["description"],
-            category_id=s["category_id"],
-            category_name=s["category_name"],
-            price=s["price"],
-            duration_minutes=s["duration_minutes"],
-            location=s["location"],
-            rating=s.get("rating", 0.0),
-            reviews_count=s.get("reviews_count", 0),
-            created_at=s["created_at"]
-        ))
-    return result
+    services, next_cursor = await fetch_page(
+        db.services, {"provider_id": current_user["sub"]}, limit, cursor, SERVICE_PROJECTION
+    )
+    return list_response(ServiceResponse, services, next_cursor)
+
+async def get_active_subscription(user_id: str) -> Optional[dict]:
+    cached = subscription_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    now = datetime.now(timezone.utc)
+    subscription = await db.subscriptions.find_one(
+        {"user_id": user_id, "is_active": True, "end_date": {"$gte": now.isoformat()}},
+        sort=[("end_date", -1)]
+    )
+    if subscription:
+        remaining = (datetime.fromisoformat(subscription["end_date"]) - now).total_seconds()
+        subscription_cache.set(user_id, subscription, ttl=remaining)
+    return subscription
 
 @api_router.post("/bookings", response_model=BookingResponse)
 async def create_booking(
@@ -275,40 +602,46 @@ async def create_booking(
     except:
         user_id = current_user["sub"]
     
-    user = await db.users.find_one({"_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    has_active_subscription = await db.subscriptions.find_one({
-        "user_id": current_user["sub"],
-        "is_active": True,
-        "end_date": {"$gte": datetime.now(timezone.utc).isoformat()}
-    })
-    
-    if not has_active_subscription:
-        if user.get("credits", 0) < 1:
-            raise HTTPException(status_code=400, detail="Insufficient credits. Please purchase a subscription.")
-        await db.users.update_one(
-            {"_id": user_id},
-            {"$inc": {"credits": -1}}
-        )
-    
     try:
         service_id = ObjectId(booking_data.service_id)
     except:
         service_id = booking_data.service_id
-        
-    service = await db.services.find_one({"_id": service_id})
+    
+    # Validate the service before touching credits so a bad id never costs the customer anything
+    service = await db.services.find_one(
+        {"_id": service_id},
+        {"title": 1, "provider_id": 1, "provider_name": 1, "category_id": 1, "price": 1, "duration_minutes": 1}
+    )
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
+    scheduled_at = slot_calendar.parse(booking_data.scheduled_date)
+    slot_calendar.check_bookable(scheduled_at, service.get("duration_minutes", 0))
+    
+    has_active_subscription = await get_active_subscription(current_user["sub"])
+    
+    if has_active_subscription:
+        user = await db.users.find_one({"_id": user_id}, {"full_name": 1})
+    else:
+        # Check and debit in one conditional update so concurrent bookings cannot overdraw credits
+        user = await db.users.find_one_and_update(
+            {"_id": user_id, "credits": {"$gte": 1}},
+            {"$inc": {"credits": -1}},
+            projection={"full_name": 1}
+        )
+        if not user and await db.users.count_documents({"_id": user_id}, limit=1):
+            raise HTTPException(status_code=400, detail="Insufficient credits. Please purchase a subscription.")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     
     booking_dict = {
         "customer_id": current_user["sub"],
         "customer_name": user["full_name"],
         "service_id": booking_data.service_id,
         "service_title": service["title"],
+        "category_id": service.get("category_id"),
         "provider_id": service["provider_id"],
         "provider_name": service["provider_name"],
+        "price": service.get("price", 0),
         "status": BookingStatus.PENDING,
         "scheduled_date": booking_data.scheduled_date,
         "notes": booking_data.notes,
@@ -316,54 +649,47 @@ async def create_booking(
         "completed_at": None
     }
     
-    result = await db.bookings.insert_one(booking_dict)
+    booking_id = ObjectId()
+    try:
+        await slot_calendar.reserve(
+            db, service["provider_id"], str(booking_id), scheduled_at, service.get("duration_minutes", 0)
+        )
+        result = await db.bookings.insert_one({"_id": booking_id, **booking_dict})
+    except Exception:
+        if not has_active_subscription:
+            await db.users.update_one({"_id": user_id}, {"$inc": {"credits": 1}})
+        await slot_calendar.release(db, str(booking_id))
+        raise
+    await increment_stats(db, total_bookings=1)
+    rollups.booking_created(booking_dict["category_id"], booking_dict["status"])
+    await publish_event(booking_event("booking.created", {"_id": result.inserted_id, **booking_dict}))
     return BookingResponse(id=str(result.inserted_id), **booking_dict)
 
 @api_router.get("/bookings/customer/me", response_model=List[BookingResponse])
-async def get_my_bookings(current_user: dict = Depends(get_current_user)):
+async def get_my_bookings(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user.get("role") != UserRole.CUSTOMER:
         raise HTTPException(status_code=403, detail="Customer access required")
-    bookings = await db.bookings.find({"customer_id": current_user["sub"]}).to_list(100)
-    result = []
-    for b in bookings:
-        result.append(BookingResponse(
-            id=str(b["_id"]),
-            customer_id=b["customer_id"],
-            customer_name=b["customer_name"],
-            service_id=b["service_id"],
-            service_title=b["service_title"],
-            provider_id=b["provider_id"],
-            provider_name=b["provider_name"],
-            status=b["status"],
-            scheduled_date=b["scheduled_date"],
-            notes=b.get("notes"),
-            created_at=b["created_at"],
-            completed_at=b.get("completed_at")
-        ))
-    return result
+    bookings, next_cursor = await fetch_page(
+        db.bookings, {"customer_id": current_user["sub"]}, limit, cursor, BOOKING_PROJECTION
+    )
+    return list_response(BookingResponse, bookings, next_cursor)
 
 @api_router.get("/bookings/provider/me", response_model=List[BookingResponse])
-async def get_provider_bookings(current_user: dict = Depends(get_current_user)):
+async def get_provider_bookings(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user.get("role") != UserRole.PROVIDER:
         raise HTTPException(status_code=403, detail="Provider access required")
-    bookings = await db.bookings.find({"provider_id": current_user["sub"]}).to_list(100)
-    result = []
-    for b in bookings:
-        result.append(BookingResponse(
-            id=str(b["_id"]),
-            customer_id=b["customer_id"],
-            customer_name=b["customer_name"],
-            service_id=b["service_id"],
-            service_title=b["service_title"],
-            provider_id=b["provider_id"],
-            provider_name=b["provider_name"],
-            status=b["status"],
-            scheduled_date=b["scheduled_date"],
-            notes=b.get("notes"),
-            created_at=b["created_at"],
-            completed_at=b.get("completed_at")
-        ))
-    return result
+    bookings, next_cursor = await fetch_page(
+        db.bookings, {"provider_id": current_user["sub"]}, limit, cursor, BOOKING_PROJECTION
+    )
+    return list_response(BookingResponse, bookings, next_cursor)
 
 @api_router.patch("/bookings/{booking_id}/status")
 async def update_booking_status(
@@ -384,17 +710,103 @@ async def update_booking_status(
     if current_user["role"] == UserRole.PROVIDER and booking["provider_id"] != current_user["sub"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    # A cancelled or rejected booking gave its slots back; reviving it has to win them again
+    reclaiming = booking["status"] in RELEASED_STATUSES and status_update.status not in RELEASED_STATUSES
+    if reclaiming:
+        try:
+            scheduled_at = slot_calendar.parse(booking["scheduled_date"])
+        except (TypeError, ValueError):
+            # Bookings from before dates were validated may have no usable time to reserve
+            reclaiming = False
+    if reclaiming:
+        duration_minutes = await booking_duration(booking)
+        slot_calendar.check_bookable(scheduled_at, duration_minutes)
+        await slot_calendar.reserve(db, booking["provider_id"], str(booking["_id"]), scheduled_at, duration_minutes)
+    
     update_data = {"status": status_update.status}
     if status_update.status == BookingStatus.COMPLETED:
         update_data["completed_at"] = datetime.now(timezone.utc).isoformat()
-        await db.provider_profiles.update_one(
-            {"user_id": booking["provider_id"]},
-            {"$inc": {"completed_jobs": 1}}
-        )
     
-    await db.bookings.update_one({"_id": booking_obj_id}, {"$set": update_data})
+    # Only the request that actually moves the booking out of its previous status applies the
+    # side effects, so a repeated or concurrent COMPLETED never counts the same job twice
+    previous = await db.bookings.find_one_and_update(
+        {"_id": booking_obj_id, "status": {"$ne": status_update.status}},
+        {"$set": update_data},
+        projection={"status": 1, "service_id": 1, "price": 1, "completed_at": 1}
+    )
+    if previous:
+        rollups.booking_status_changed(status_update.status)
+        await publish_event(booking_event(
+            "booking.status", booking,
+            status=status_update.status,
+            completed_at=update_data.get("completed_at", booking.get("completed_at"))
+        ))
+        if BookingStatus.COMPLETED in (previous["status"], status_update.status):
+            await apply_completion(booking["provider_id"], previous, update_data)
+        if status_update.status in RELEASED_STATUSES and previous["status"] not in RELEASED_STATUSES:
+            await slot_calendar.release(db, str(booking["_id"]))
+    elif reclaiming:
+        await slot_calendar.release(db, str(booking["_id"]))
     return {"status": "updated"}
 
+async def booking_duration(booking: dict) -> int:
+    from bson import ObjectId
+    try:
+        service_id = ObjectId(booking["service_id"])
+    except:
+        service_id = booking["service_id"]
+    service = await db.services.find_one({"_id": service_id}, {"duration_minutes": 1})
+    return service.get("duration_minutes", 0) if service else 0
+
+async def apply_completion(provider_id: str, previous: dict, update_data: dict):
+    price = previous.get("price")
+    if price is None:
+        from bson import ObjectId
+        try:
+            service_id = ObjectId(previous["service_id"])
+        except:
+            service_id = previous["service_id"]
+        service = await db.services.find_one({"_id": service_id}, {"price": 1})
+        price = service.get("price", 0) if service else 0
+        await db.bookings.update_one({"_id": previous["_id"]}, {"$set": {"price": price}})
+    
+    if update_data["status"] == BookingStatus.COMPLETED:
+        delta = completion_delta(price, update_data["completed_at"])
+    else:
+        delta = completion_delta(price, previous.get("completed_at") or datetime.now(timezone.utc).isoformat(), sign=-1)
+    await db.provider_profiles.update_one({"user_id": provider_id}, {"$inc": delta})
+    await invalidations.publish(db, "earnings", provider_id)
+
+async def publish_event(event: dict):
+    # Live updates are best effort; clients reconcile with the list endpoints on reconnect
+    try:
+        await event_broker.publish(event)
+    except Exception as e:
+        logger.error(f"Publishing {event['type']} failed: {e}")
+
+@api_router.post("/bookings/stream-token")
+async def create_booking_stream_token(current_user: dict = Depends(get_current_user)):
+    return {"token": create_stream_token(current_user), "expires_in": STREAM_TOKEN_EXPIRE_SECONDS}
+
+@api_router.get("/bookings/stream")
+async def stream_bookings(
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    # EventSource cannot send headers, so browsers pass a short-lived stream token as ?token=;
+    # the long-lived access token is only accepted in the Authorization header
+    if credentials:
+        current_user = verify_token(credentials.credentials)
+    elif token:
+        current_user = verify_token(token, scope=STREAM_SCOPE)
+    else:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return StreamingResponse(
+        sse_events(event_broker, current_user["sub"], SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.post("/reviews", response_model=ReviewResponse)
 async def create_review(
     review_data: ReviewCreate,
@@ -423,56 +835,93 @@ async def create_review(
     
     result = await db.reviews.insert_one(review_dict)
     
-    reviews = await db.reviews.find({"provider_id": booking["provider_id"]}).to_list(1000)
-    avg_rating = sum(r["rating"] for r in reviews) / len(reviews)
-    
-    await db.provider_profiles.update_one(
+    provider = await db.provider_profiles.find_one_and_update(
         {"user_id": booking["provider_id"]},
-        {"$set": {"rating": avg_rating}}
+        {"$inc": {"rating_sum": review_data.rating, "rating_count": 1}},
+        projection={"rating_sum": 1, "rating_count": 1},
+        return_document=ReturnDocument.AFTER
     )
     
-    await db.services.update_many(
-        {"provider_id": booking["provider_id"]},
-        {"$set": {"rating": avg_rating, "reviews_count": len(reviews)}}
-    )
+    if provider:
+        rating_count = provider["rating_count"]
+        avg_rating = provider["rating_sum"] / rating_count
+        # Guarded on the count so a slower concurrent review never overwrites a newer average
+        await db.provider_profiles.update_one(
+            {"user_id": booking["provider_id"], "rating_count": rating_count},
+            {"$set": {"rating": avg_rating}}
+        )
+        await db.services.update_many(
+            {"provider_id": booking["provider_id"], "reviews_count": {"$lt": rating_count}},
+            {"$set": {"rating": avg_rating, "reviews_count": rating_count}}
+        )
+        await catalog_version.bump(db)
+        await invalidations.publish(db, "earnings", booking["provider_id"])
     
     return ReviewResponse(id=str(result.inserted_id), **review_dict)
 
 @api_router.post("/payments/create-order")
 async def create_payment_order(
     payment_data: PaymentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=40),
     current_user: dict = Depends(get_current_user)
 ):
+    idempotency_key = idempotency_key or uuid.uuid4().hex
+    payment_dict = {
+        "user_id": current_user["sub"],
+        "order_id": None,
+        "idempotency_key": idempotency_key,
+        "amount": payment_data.amount,
+        "currency": payment_data.currency,
+        "status": PaymentStatus.CREATED,
+        "purpose": payment_data.purpose,
+        "reference_id": payment_data.reference_id,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    # Claim the key before calling the gateway: the unique index lets exactly one of several
+    # concurrent requests with the same Idempotency-Key create the order
     try:
-        order_data = {
-            "amount": payment_data.amount,
-            "currency": payment_data.currency,
-            "payment_capture": 1
-        }
-        razorpay_order = razorpay_client.order.create(order_data)
-        
-        payment_dict = {
-            "user_id": current_user["sub"],
-            "order_id": razorpay_order["id"],
-            "amount": payment_data.amount,
-            "currency": payment_data.currency,
-            "status": PaymentStatus.CREATED,
-            "purpose": payment_data.purpose,
-            "reference_id": payment_data.reference_id,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        
-        await db.payments.insert_one(payment_dict)
-        
+        claim = await db.payments.insert_one(payment_dict)
+    except DuplicateKeyError:
+        # Another request holds the key; give it a moment to finish creating the order
+        deadline = asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            existing = await db.payments.find_one(
+                {"user_id": current_user["sub"], "idempotency_key": idempotency_key}
+            )
+            if existing and existing.get("order_id"):
+                break
+            if not existing or asyncio.get_running_loop().time() >= deadline:
+                raise HTTPException(status_code=409, detail="A payment with this Idempotency-Key is still being created")
+            await asyncio.sleep(0.1)
         return {
-            "order_id": razorpay_order["id"],
-            "amount": razorpay_order["amount"],
-            "currency": razorpay_order["currency"],
+            "order_id": existing["order_id"],
+            "amount": existing["amount"],
+            "currency": existing["currency"],
             "key_id": razorpay_key_id
         }
+    
+    try:
+        razorpay_order = await payment_gateway.create_order(
+            payment_data.amount, payment_data.currency, idempotency_key
+        )
     except Exception as e:
-        logger.error(f"Payment order creation failed: {e}")
-        raise HTTPException(status_code=500, detail="Payment order creation failed")
+        # Give the key back so the client can retry with it
+        await db.payments.delete_one({"_id": claim.inserted_id})
+        if isinstance(e, CircuitOpenError):
+            raise HTTPException(status_code=503, detail="Payments are temporarily unavailable")
+        if isinstance(e, PaymentGatewayError):
+            logger.error(f"Payment order creation failed: {e}")
+            raise HTTPException(status_code=500, detail="Payment order creation failed")
+        raise
+    
+    await db.payments.update_one({"_id": claim.inserted_id}, {"$set": {"order_id": razorpay_order["id"]}})
+    
+    return {
+        "order_id": razorpay_order["id"],
+        "amount": razorpay_order["amount"],
+        "currency": razorpay_order["currency"],
+        "key_id": razorpay_key_id
+    }
 
 @api_router.post("/payments/verify")
 async def verify_payment(
@@ -481,25 +930,24 @@ async def verify_payment(
     signature: str,
     current_user: dict = Depends(get_current_user)
 ):
-    try:
-        razorpay_client.utility.verify_payment_signature({
-            "razorpay_payment_id": payment_id,
-            "razorpay_order_id": order_id,
-            "razorpay_signature": signature
-        })
-        
-        await db.payments.update_one(
-            {"order_id": order_id},
-            {"$set": {"status": PaymentStatus.SUCCESS, "payment_id": payment_id}}
-        )
-        
-        return {"status": "success"}
-    except Exception as e:
+    if not payment_gateway.verify_signature(order_id, payment_id, signature):
         await db.payments.update_one(
-            {"order_id": order_id},
+            {"order_id": order_id, "status": {"$ne": PaymentStatus.SUCCESS}},
             {"$set": {"status": PaymentStatus.FAILED}}
         )
         raise HTTPException(status_code=400, detail="Payment verification failed")
+    
+    # Only the transition into SUCCESS counts towards revenue, so repeated verifies are harmless
+    payment = await db.payments.find_one_and_update(
+        {"order_id": order_id, "status": {"$ne": PaymentStatus.SUCCESS}},
+        {"$set": {"status": PaymentStatus.SUCCESS, "payment_id": payment_id}},
+        projection={"amount": 1, "purpose": 1}
+    )
+    if payment:
+        await increment_stats(db, revenue=payment["amount"])
+        rollups.payment_succeeded(payment.get("purpose"), payment["amount"])
+    
+    return {"status": "success"}
 
 @api_router.post("/subscriptions", response_model=SubscriptionResponse)
 async def create_subscription(
@@ -523,34 +971,53 @@ async def create_subscription(
     }
     
     result = await db.subscriptions.insert_one(subscription_dict)
+    subscription_cache.invalidate(current_user["sub"])
     return SubscriptionResponse(id=str(result.inserted_id), **subscription_dict)
 
 @api_router.get("/subscriptions/me")
 async def get_my_subscription(current_user: dict = Depends(get_current_user)):
-    subscription = await db.subscriptions.find_one(
-        {"user_id": current_user["sub"], "is_active": True},
-        {"_id": 0}
-    )
+    subscription = await get_active_subscription(current_user["sub"])
     if subscription:
-        return SubscriptionResponse(id=subscription.get("id", ""), **subscription)
+        return SubscriptionResponse(
+            id=str(subscription["_id"]),
+            **{k: v for k, v in subscription.items() if k != "_id"}
+        )
     return None
 
 @api_router.get("/admin/providers", response_model=List[dict])
-async def get_pending_providers(current_user: dict = Depends(get_current_user)):
+async def get_pending_providers(
+    status: Optional[ProviderStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user.get("role") != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    providers = await db.provider_profiles.find({}, {"_id": 0}).to_list(100)
+    from bson import ObjectId
+    query = {"status": status} if status else {}
+    providers, next_cursor = await fetch_page(db.provider_profiles, query, limit, cursor)
+    
+    # Users may be keyed by ObjectId or by its string form, so look up both in one query
+    user_ids = [p["user_id"] for p in providers]
+    lookup_ids = user_ids + [ObjectId(u) for u in user_ids if ObjectId.is_valid(u)]
+    users = await db.users.find(
+        {"_id": {"$in": lookup_ids}},
+        {"email": 1, "full_name": 1, "phone": 1}
+    ).to_list(None)
+    users_by_id = {str(u["_id"]): u for u in users}
+    
     result = []
     for provider in providers:
-        user = await db.users.find_one({"_id": provider["user_id"]})
+        user = users_by_id.get(provider["user_id"])
         if user:
+            provider.pop("_id")
             result.append({
                 **provider,
                 "email": user["email"],
                 "full_name": user["full_name"],
                 "phone": user["phone"]
             })
-    return result
+    return FastJSONResponse(result, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
 
 @api_router.patch("/admin/providers/{user_id}/status")
 async def update_provider_status(
@@ -560,56 +1027,182 @@ async def update_provider_status(
 ):
     if current_user.get("role") != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    await db.provider_profiles.update_one(
+    provider = await db.provider_profiles.find_one_and_update(
         {"user_id": user_id},
-        {"$set": {"status": status}}
+        {"$set": {"status": status}},
+        projection={"status": 1}
     )
+    if provider:
+        was_pending = provider.get("status") == ProviderStatus.PENDING
+        is_pending = status == ProviderStatus.PENDING
+        if was_pending != is_pending:
+            await increment_stats(db, pending_approvals=1 if is_pending else -1)
     return {"status": "updated"}
 
-@api_router.get("/admin/users")
-async def get_all_users(current_user: dict = Depends(get_current_user)):
+@api_router.get("/admin/users", response_model=List[UserResponse])
+async def get_all_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    users, next_cursor = await fetch_page(db.users, {}, limit, cursor, USER_PROJECTION)
+    return list_response(UserResponse, users, next_cursor)
+
+@api_router.get("/admin/users/export")
+async def export_users(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    role: Optional[UserRole] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user.get("role") != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    users = await db.users.find({}, {"_id": 0, "password": 0}).to_list(1000)
-    return users
+    query = {}
+    if role:
+        query["role"] = role
+    # created_at is stored as a UTC ISO string, so the bounds are compared in the same form
+    bounds = {op: d if d.tzinfo else d.replace(tzinfo=timezone.utc)
+              for op, d in (("$gte", created_from), ("$lt", created_to)) if d}
+    if bounds:
+        query["created_at"] = {op: d.astimezone(timezone.utc).isoformat() for op, d in bounds.items()}
+    cursor = db.users.find(query, USER_PROJECTION, batch_size=EXPORT_BATCH_SIZE).sort([("created_at", -1), ("_id", -1)])
+    return export_response(cursor, UserResponse, fmt, "users", exclude=("provider_status",))
 
 @api_router.get("/admin/stats")
 async def get_admin_stats(current_user: dict = Depends(get_current_user)):
     if current_user.get("role") != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    total_users = await db.users.count_documents({})
-    total_bookings = await db.bookings.count_documents({})
-    total_providers = await db.provider_profiles.count_documents({})
-    pending_approvals = await db.provider_profiles.count_documents({"status": ProviderStatus.PENDING})
-    
-    payments = await db.payments.find({"status": PaymentStatus.SUCCESS}).to_list(1000)
-    total_revenue = sum(p["amount"] for p in payments) / 100
+    stats = await get_stats(catalog_db)
+    return {
+        "total_users": stats.get("total_users", 0),
+        "total_bookings": stats.get("total_bookings", 0),
+        "total_providers": stats.get("total_providers", 0),
+        "pending_approvals": stats.get("pending_approvals", 0),
+        "total_revenue": stats.get("revenue", 0) / 100
+    }
+
+@api_router.get("/admin/analytics")
+async def get_admin_analytics(
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    granularity: Literal["hour", "day"] = "day",
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    end = to or datetime.now(timezone.utc)
+    start = from_ or end - (timedelta(days=30) if granularity == "day" else timedelta(hours=48))
+    start, end = [d if d.tzinfo else d.replace(tzinfo=timezone.utc) for d in (start, end)]
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if bucket_count(start, end, granularity) > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range too large for {granularity} granularity")
     
     return {
-        "total_users": total_users,
-        "total_bookings": total_bookings,
-        "total_providers": total_providers,
-        "pending_approvals": pending_approvals,
-        "total_revenue": total_revenue
+        "granularity": granularity,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "series": await read_series(catalog_db, start, end, granularity)
     }
 
+@api_router.get("/admin/runtime-stats")
+async def get_runtime_stats(current_user: dict = Depends(get_current_user)):
+    if current_user.get("role") != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {
+        "password_pool": password_pool_stats(),
+        "token_cache": token_cache_stats(),
+        "payment_gateway": {"circuit": payment_gateway.breaker.state},
+        "category_cache": category_cache.stats(),
+        "subscription_cache": subscription_cache.stats(),
+        "earnings_cache": earnings_cache.stats(),
+        "event_broker": event_broker.stats()
+    }
+
+async def get_earnings_profile(provider_id: str) -> dict:
+    cached = earnings_cache.get(provider_id)
+    if cached is not None:
+        return cached
+    provider = await db.provider_profiles.find_one(
+        {"user_id": provider_id},
+        {"_id": 0, "total_earnings": 1, "completed_jobs": 1, "rating": 1, "rating_count": 1, "earnings_by_month": 1}
+    )
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    earnings_cache.set(provider_id, provider)
+    return provider
+
 @api_router.get("/provider/earnings")
 async def get_provider_earnings(current_user: dict = Depends(get_current_user)):
     if current_user.get("role") != UserRole.PROVIDER:
         raise HTTPException(status_code=403, detail="Provider access required")
-    provider = await db.provider_profiles.find_one({"user_id": current_user["sub"]})
-    completed_bookings = await db.bookings.count_documents({
-        "provider_id": current_user["sub"],
-        "status": BookingStatus.COMPLETED
-    })
-    
-    reviews = await db.reviews.find({"provider_id": current_user["sub"]}).to_list(100)
+    provider = await get_earnings_profile(current_user["sub"])
     
     return {
         "total_earnings": provider.get("total_earnings", 0),
-        "completed_jobs": completed_bookings,
+        "completed_jobs": provider.get("completed_jobs", 0),
         "rating": provider.get("rating", 0),
-        "total_reviews": len(reviews)
+        "total_reviews": provider.get("rating_count", 0)
+    }
+
+@api_router.get("/provider/earnings/monthly")
+async def get_provider_monthly_earnings(
+    months: int = Query(12, ge=1, le=120),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") != UserRole.PROVIDER:
+        raise HTTPException(status_code=403, detail="Provider access required")
+    provider = await get_earnings_profile(current_user["sub"])
+    return monthly_series(provider.get("earnings_by_month", {}), months)
+
+@api_router.get("/admin/providers/{provider_id}/earnings/monthly")
+async def get_provider_monthly_earnings_admin(
+    provider_id: str,
+    months: int = Query(12, ge=1, le=120),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    provider = await get_earnings_profile(provider_id)
+    return monthly_series(provider.get("earnings_by_month", {}), months)
+
+@api_router.get("/providers/{provider_id}/availability")
+async def get_provider_availability(
+    provider_id: str,
+    start: date,
+    end: Optional[date] = None,
+    service_id: Optional[str] = None
+):
+    end = end or start
+    if end < start or (end - start).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must cover 1 to {MAX_AVAILABILITY_DAYS} days")
+    if not await db.provider_profiles.find_one({"user_id": provider_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Provider not found")
+    
+    duration_minutes = None
+    if service_id:
+        from bson import ObjectId
+        try:
+            service_obj_id = ObjectId(service_id)
+        except:
+            service_obj_id = service_id
+        service = await db.services.find_one(
+            {"_id": service_obj_id, "provider_id": provider_id}, {"duration_minutes": 1}
+        )
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        duration_minutes = service.get("duration_minutes")
+    
+    slots = await slot_calendar.free_slots(db, provider_id, start, end, duration_minutes)
+    return {
+        "provider_id": provider_id,
+        "timezone": str(slot_calendar.tz),
+        "slot_minutes": int(slot_calendar.slot.total_seconds() // 60),
+        "duration_minutes": duration_minutes,
+        "slots": slots
     }
 
 @api_router.get("/")
@@ -624,15 +1217,53 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+# Outermost, so the recorded latency covers every other middleware; Server-Timing only in debug mode
+app.add_middleware(MetricsMiddleware, server_timing=DEBUG)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.on_event("startup")
 async def startup_event():
+    # With several workers only the lease holder seeds; the others wait for it to finish
+    startup_lock = LeaderLock(db, "startup", ttl=STARTUP_LOCK_TTL_SECONDS)
+    if await startup_lock.acquire():
+        try:
+            await seed_database()
+        except Exception:
+            await startup_lock.release()
+            raise
+        await startup_lock.complete()
+    else:
+        logger.info("Database seeding is handled by another worker, waiting for it")
+        await startup_lock.wait(STARTUP_LOCK_TTL_SECONDS)
+    
+    await catalog_version.refresh(catalog_db)
+    await invalidations.poll(db)
+    await event_broker.start(db)
+    background_tasks.append(asyncio.create_task(refresh_search_index()))
+    background_tasks.append(asyncio.create_task(expire_subscriptions()))
+    background_tasks.append(asyncio.create_task(catalog_version.run(catalog_db, CATALOG_VERSION_REFRESH_SECONDS)))
+    background_tasks.append(asyncio.create_task(invalidations.run(db, INVALIDATION_POLL_SECONDS)))
+    background_tasks.append(asyncio.create_task(rollups.run(db, ANALYTICS_FLUSH_INTERVAL_SECONDS)))
+    if STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(reconcile_stats_periodically()))
+
+async def seed_database():
+    if ENSURE_INDEXES_ON_STARTUP:
+        await ensure_indexes(db)
+    
     admin_exists = await db.users.find_one({"role": UserRole.ADMIN})
     if not admin_exists:
         admin_user = {
             "email": "admin@endlesspath.com",
-            "password": get_password_hash("admin123"),
+            "password": await hash_password("admin123"),
             "full_name": "Admin User",
             "phone": "+919182298869",
             "role": UserRole.ADMIN,
@@ -724,7 +1355,67 @@ async def startup_event():
             cat["created_at"] = datetime.now(timezone.utc).isoformat()
         await db.categories.insert_many(categories)
         logger.info("All 12 service categories created")
+    
+    if not await db.stats.find_one({"_id": STATS_ID}, {"_id": 1}):
+        await reconcile_stats(db)
+    
+    if INDEX_USAGE_REPORT:
+        await index_usage_report(db)
+
+async def refresh_search_index():
+    """Rebuild every SEARCH_INDEX_REFRESH_SECONDS; in between, add new services whenever the catalog version moves."""
+    global search_index
+    loop = asyncio.get_running_loop()
+    rebuild_at = 0.0
+    indexed_version = since = None
+    while True:
+        version, started = catalog_version.value, datetime.now(timezone.utc)
+        try:
+            if loop.time() >= rebuild_at:
+                search_index = await build_service_index(catalog_db)
+                rebuild_at = loop.time() + SEARCH_INDEX_REFRESH_SECONDS
+                logger.info(f"Search index built with {len(search_index)} services")
+            elif version != indexed_version:
+                # Read from the primary: the service behind a version bump may not have reached a secondary yet
+                await add_services_since(
+                    search_index, db, (since - timedelta(seconds=SEARCH_INDEX_LOOKBACK_SECONDS)).isoformat()
+                )
+            indexed_version, since = version, started
+        except Exception as e:
+            logger.error(f"Search index refresh failed: {e}")
+        await asyncio.sleep(CATALOG_VERSION_REFRESH_SECONDS)
+
+# Database-wide jobs hold a lease for one interval so only one worker runs each tick
+async def reconcile_stats_periodically():
+    lock = LeaderLock(db, "reconcile-stats", ttl=STATS_RECONCILE_INTERVAL_SECONDS)
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL_SECONDS)
+        try:
+            if await lock.acquire():
+                await reconcile_stats(db)
+        except Exception as e:
+            logger.error(f"Stats reconciliation failed: {e}")
+
+async def expire_subscriptions():
+    lock = LeaderLock(db, "expire-subscriptions", ttl=SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS)
+    while True:
+        try:
+            if await lock.acquire():
+                result = await db.subscriptions.update_many(
+                    {"is_active": True, "end_date": {"$lt": datetime.now(timezone.utc).isoformat()}},
+                    {"$set": {"is_active": False}}
+                )
+                if result.modified_count:
+                    logger.info(f"Deactivated {result.modified_count} expired subscriptions")
+        except Exception as e:
+            logger.error(f"Subscription expiry job failed: {e}")
+        await asyncio.sleep(SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    await rollups.flush(db)
+    await event_broker.close()
+    await payment_gateway.close()
     client.close()
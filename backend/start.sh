@@ -1,4 +1,5 @@
 #!/bin/bash
-# Production start script with dynamic PORT support
+# Production start script with dynamic PORT support; see serve.py for WEB_CONCURRENCY and tuning settings
 PORT=${PORT:-8001}
-uvicorn server:app --host 0.0.0.0 --port $PORT
+export PORT
+exec python serve.py
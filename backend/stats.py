@@ -0,0 +1,41 @@
+import logging
+
+from models import PaymentStatus, ProviderStatus
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = "global"
+
+
+async def increment_stats(db, **deltas):
+    await db.stats.update_one({"_id": STATS_ID}, {"$inc": deltas}, upsert=True)
+
+
+async def reconcile_stats(db):
+    """Rebuild the stats document from the source collections with server-side aggregations."""
+    provider_counts = await db.provider_profiles.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    revenue = await db.payments.aggregate([
+        {"$match": {"status": PaymentStatus.SUCCESS}},
+        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+    ]).to_list(None)
+
+    by_status = {c["_id"]: c["count"] for c in provider_counts}
+    stats = {
+        "total_users": await db.users.count_documents({}),
+        "total_bookings": await db.bookings.count_documents({}),
+        "total_providers": sum(by_status.values()),
+        "pending_approvals": by_status.get(ProviderStatus.PENDING, 0),
+        "revenue": revenue[0]["total"] if revenue else 0,
+    }
+    await db.stats.replace_one({"_id": STATS_ID}, stats, upsert=True)
+    logger.info(f"Stats reconciled: {stats}")
+    return stats
+
+
+async def get_stats(db):
+    stats = await db.stats.find_one({"_id": STATS_ID}, {"_id": 0})
+    if stats is None:
+        stats = await reconcile_stats(db)
+    return stats
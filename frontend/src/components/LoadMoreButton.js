@@ -0,0 +1,18 @@
+import React from 'react';
+import { Button } from './ui/button';
+
+export const LoadMoreButton = ({ hasMore, loadingMore, onClick }) => {
+  if (!hasMore) return null;
+  return (
+    <div className="text-center mt-6">
+      <Button
+        onClick={onClick}
+        disabled={loadingMore}
+        data-testid="load-more-btn"
+        className="btn-secondary"
+      >
+        {loadingMore ? 'Loading...' : 'Load more'}
+      </Button>
+    </div>
+  );
+};
@@ -56,6 +56,9 @@ export const AuthProvider = ({ children }) => {
   };
 
   const logout = () => {
+    if (axios.defaults.headers.common['Authorization']) {
+      axios.post(`${API}/auth/logout`).catch(() => {});
+    }
     localStorage.removeItem('token');
     setToken(null);
     setUser(null);
@@ -64,6 +67,7 @@ export const AuthProvider = ({ children }) => {
 
   const value = {
     user,
+    token,
     loading,
     login,
     register,
@@ -0,0 +1,67 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+import { API, useAuth } from '../context/AuthContext';
+
+const RECONNECT_DELAY_MS = 3000;
+
+// Subscribes to /bookings/stream and calls onEvent(type, booking) for every
+// booking.created / booking.status event addressed to the signed-in user.
+// EventSource cannot send headers, so each connection uses a short-lived stream
+// token in the URL; when the browser's own retry fails because that token has
+// expired, a fresh one is fetched and the stream reopened.
+export const useBookingStream = (onEvent) => {
+  const { token } = useAuth();
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+
+  useEffect(() => {
+    if (!token || typeof EventSource === 'undefined') return undefined;
+    let source = null;
+    let retry = null;
+    let closed = false;
+
+    const listener = (event) => {
+      const { type, booking } = JSON.parse(event.data);
+      handler.current(type, booking);
+    };
+
+    const reconnectLater = () => {
+      if (!closed) retry = setTimeout(connect, RECONNECT_DELAY_MS);
+    };
+
+    async function connect() {
+      try {
+        const response = await axios.post(`${API}/bookings/stream-token`, null, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        if (closed) return;
+        source = new EventSource(`${API}/bookings/stream?token=${encodeURIComponent(response.data.token)}`);
+      } catch (error) {
+        reconnectLater();
+        return;
+      }
+      source.addEventListener('booking.created', listener);
+      source.addEventListener('booking.status', listener);
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) reconnectLater();
+      };
+    }
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (source) source.close();
+    };
+  }, [token]);
+};
+
+export const mergeBookingEvent = (bookings, type, booking) => {
+  const index = bookings.findIndex((b) => b.id === booking.id);
+  if (index === -1) {
+    return type === 'booking.created' ? [booking, ...bookings] : bookings;
+  }
+  const next = [...bookings];
+  next[index] = { ...next[index], ...booking };
+  return next;
+};
@@ -0,0 +1,61 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import axios from 'axios';
+import { API } from '../context/AuthContext';
+
+// axios exposes response headers lower-cased
+const NEXT_CURSOR_HEADER = 'x-next-cursor';
+
+// Loads the first page of a cursor-paginated list endpoint; loadMore() appends
+// the next page for as long as the server keeps sending X-Next-Cursor.
+// Changing path or params starts over from the first page.
+export const useCursorList = (path, params = {}) => {
+  const [items, setItems] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const generation = useRef(0);
+  const paramsKey = JSON.stringify(params);
+
+  const fetchPage = useCallback(async (after) => {
+    const query = { ...JSON.parse(paramsKey), ...(after ? { cursor: after } : {}) };
+    const response = await axios.get(`${API}${path}`, { params: query });
+    return { page: response.data, next: response.headers[NEXT_CURSOR_HEADER] || null };
+  }, [path, paramsKey]);
+
+  const reload = useCallback(async () => {
+    const current = ++generation.current;
+    try {
+      const { page, next } = await fetchPage(null);
+      // A newer reload (e.g. the filters changed again) has superseded this one
+      if (current !== generation.current) return;
+      setItems(page);
+      setCursor(next);
+    } catch (error) {
+      console.error(`Failed to fetch ${path}:`, error);
+    } finally {
+      if (current === generation.current) setLoading(false);
+    }
+  }, [fetchPage, path]);
+
+  const loadMore = async () => {
+    if (!cursor || loadingMore) return;
+    const current = generation.current;
+    setLoadingMore(true);
+    try {
+      const { page, next } = await fetchPage(cursor);
+      if (current !== generation.current) return;
+      setItems((existing) => [...existing, ...page]);
+      setCursor(next);
+    } catch (error) {
+      console.error(`Failed to fetch more of ${path}:`, error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  return { items, setItems, loading, loadingMore, hasMore: Boolean(cursor), loadMore, reload };
+};
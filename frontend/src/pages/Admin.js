@@ -4,6 +4,8 @@ import { Users, Briefcase, DollarSign, TrendingUp, Check, X } from 'lucide-react
 import { API } from '../context/AuthContext';
 import { toast } from 'sonner';
 import { Button } from '../components/ui/button';
+import { LoadMoreButton } from '../components/LoadMoreButton';
+import { useCursorList } from '../hooks/use-cursor-list';
 
 export const AdminDashboard = () => {
   const [stats, setStats] = useState(null);
@@ -110,23 +112,9 @@ export const AdminDashboard = () => {
 };
 
 export const AdminProviders = () => {
-  const [providers, setProviders] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    fetchProviders();
-  }, []);
-
-  const fetchProviders = async () => {
-    try {
-      const response = await axios.get(`${API}/admin/providers`);
-      setProviders(response.data);
-    } catch (error) {
-      console.error('Failed to fetch providers:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  const {
+    items: providers, loading, loadingMore, hasMore, loadMore, reload: fetchProviders
+  } = useCursorList('/admin/providers');
 
   const updateStatus = async (userId, status) => {
     try {
@@ -232,29 +220,14 @@ export const AdminProviders = () => {
             ))}
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loadingMore={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
 };
 
 export const AdminUsers = () => {
-  const [users, setUsers] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    fetchUsers();
-  }, []);
-
-  const fetchUsers = async () => {
-    try {
-      const response = await axios.get(`${API}/admin/users`);
-      setUsers(response.data);
-    } catch (error) {
-      console.error('Failed to fetch users:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  const { items: users, loading, loadingMore, hasMore, loadMore } = useCursorList('/admin/users');
 
   return (
     <div className="min-h-screen py-8 pb-24 md:pb-8">
@@ -309,6 +282,7 @@ export const AdminUsers = () => {
             </div>
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loadingMore={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
@@ -3,7 +3,10 @@ import axios from 'axios';
 import { CreditCard, Calendar, Star, Package, TrendingUp, IndianRupee } from 'lucide-react';
 import { API, useAuth } from '../context/AuthContext';
 import { toast } from 'sonner';
+import { mergeBookingEvent, useBookingStream } from '../hooks/use-booking-stream';
 import { Button } from '../components/ui/button';
+import { LoadMoreButton } from '../components/LoadMoreButton';
+import { useCursorList } from '../hooks/use-cursor-list';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '../components/ui/dialog';
 
 export const CustomerDashboard = () => {
@@ -29,8 +32,8 @@ export const CustomerDashboard = () => {
 
   const fetchRecentBookings = async () => {
     try {
-      const response = await axios.get(`${API}/bookings/customer/me`);
-      setRecentBookings(response.data.slice(0, 5));
+      const response = await axios.get(`${API}/bookings/customer/me`, { params: { limit: 5 } });
+      setRecentBookings(response.data);
     } catch (error) {
       console.error('Failed to fetch bookings:', error);
     }
@@ -238,23 +241,13 @@ export const CustomerDashboard = () => {
 };
 
 export const CustomerBookings = () => {
-  const [bookings, setBookings] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const {
+    items: bookings, setItems: setBookings, loading, loadingMore, hasMore, loadMore, reload: fetchBookings
+  } = useCursorList('/bookings/customer/me');
 
-  useEffect(() => {
-    fetchBookings();
-  }, []);
-
-  const fetchBookings = async () => {
-    try {
-      const response = await axios.get(`${API}/bookings/customer/me`);
-      setBookings(response.data);
-    } catch (error) {
-      console.error('Failed to fetch bookings:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  useBookingStream((type, booking) => {
+    setBookings((current) => mergeBookingEvent(current, type, booking));
+  });
 
   return (
     <div className="min-h-screen py-8 pb-24 md:pb-8">
@@ -276,6 +269,7 @@ export const CustomerBookings = () => {
             ))}
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loadingMore={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
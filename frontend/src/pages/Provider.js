@@ -3,7 +3,10 @@ import axios from 'axios';
 import { DollarSign, Briefcase, Star, TrendingUp, Plus } from 'lucide-react';
 import { API, useAuth } from '../context/AuthContext';
 import { toast } from 'sonner';
+import { mergeBookingEvent, useBookingStream } from '../hooks/use-booking-stream';
 import { Button } from '../components/ui/button';
+import { LoadMoreButton } from '../components/LoadMoreButton';
+import { useCursorList } from '../hooks/use-cursor-list';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '../components/ui/dialog';
 import { Input } from '../components/ui/input';
 import { Textarea } from '../components/ui/textarea';
@@ -112,7 +115,9 @@ export const ProviderDashboard = () => {
 };
 
 export const ProviderServices = () => {
-  const [services, setServices] = useState([]);
+  const {
+    items: services, loadingMore, hasMore, loadMore, reload: fetchServices
+  } = useCursorList('/services/provider/me');
   const [categories, setCategories] = useState([]);
   const [createOpen, setCreateOpen] = useState(false);
   const [formData, setFormData] = useState({
@@ -125,19 +130,9 @@ export const ProviderServices = () => {
   });
 
   useEffect(() => {
-    fetchServices();
     fetchCategories();
   }, []);
 
-  const fetchServices = async () => {
-    try {
-      const response = await axios.get(`${API}/services/provider/me`);
-      setServices(response.data);
-    } catch (error) {
-      console.error('Failed to fetch services:', error);
-    }
-  };
-
   const fetchCategories = async () => {
     try {
       const response = await axios.get(`${API}/categories`);
@@ -278,35 +273,26 @@ export const ProviderServices = () => {
             ))}
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loadingMore={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
 };
 
 export const ProviderBookings = () => {
-  const [bookings, setBookings] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    fetchBookings();
-  }, []);
+  const {
+    items: bookings, setItems: setBookings, loading, loadingMore, hasMore, loadMore
+  } = useCursorList('/bookings/provider/me');
 
-  const fetchBookings = async () => {
-    try {
-      const response = await axios.get(`${API}/bookings/provider/me`);
-      setBookings(response.data);
-    } catch (error) {
-      console.error('Failed to fetch bookings:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  useBookingStream((type, booking) => {
+    setBookings((current) => mergeBookingEvent(current, type, booking));
+  });
 
   const updateStatus = async (bookingId, status) => {
     try {
       await axios.patch(`${API}/bookings/${bookingId}/status`, { status });
       toast.success('Status updated successfully!');
-      fetchBookings();
+      setBookings((current) => current.map((b) => (b.id === bookingId ? { ...b, status } : b)));
     } catch (error) {
       toast.error('Failed to update status');
     }
@@ -381,6 +367,7 @@ export const ProviderBookings = () => {
             ))}
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loadingMore={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
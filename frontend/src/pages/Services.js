@@ -6,22 +6,29 @@ import { toast } from 'sonner';
 import { API } from '../context/AuthContext';
 import { useAuth } from '../context/AuthContext';
 import { Button } from '../components/ui/button';
+import { LoadMoreButton } from '../components/LoadMoreButton';
+import { useCursorList } from '../hooks/use-cursor-list';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '../components/ui/dialog';
 import { Input } from '../components/ui/input';
 import { Textarea } from '../components/ui/textarea';
 
 export const ServicesPage = () => {
-  const [services, setServices] = useState([]);
   const [categories, setCategories] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState('');
   const [searchQuery, setSearchQuery] = useState('');
-  const [loading, setLoading] = useState(true);
   const { user } = useAuth();
 
+  const params = {};
+  if (selectedCategory) params.category_id = selectedCategory;
+  if (searchQuery) {
+    params.search = searchQuery;
+    params.search_mode = 'prefix';
+  }
+  const { items: services, loading, loadingMore, hasMore, loadMore } = useCursorList('/services', params);
+
   useEffect(() => {
     fetchCategories();
-    fetchServices();
-  }, [selectedCategory, searchQuery]);
+  }, []);
 
   const fetchCategories = async () => {
     try {
@@ -32,20 +39,6 @@ export const ServicesPage = () => {
     }
   };
 
-  const fetchServices = async () => {
-    try {
-      const params = {};
-      if (selectedCategory) params.category_id = selectedCategory;
-      if (searchQuery) params.search = searchQuery;
-      const response = await axios.get(`${API}/services`, { params });
-      setServices(response.data);
-    } catch (error) {
-      console.error('Failed to fetch services:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   return (
     <div className="min-h-screen py-8 pb-24 md:pb-8">
       <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
@@ -99,6 +92,7 @@ export const ServicesPage = () => {
             ))}
           </div>
         )}
+        <LoadMoreButton hasMore={hasMore} loadingMore={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
@@ -0,0 +1,31 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from mongomock_motor import AsyncMongoMockClient
+
+from analytics import bucket_count, read_series
+
+END = datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def test_bucket_count_includes_the_floored_first_bucket_and_the_last():
+    assert bucket_count(END - timedelta(hours=10), END, "hour") == 11
+    assert bucket_count(END - timedelta(hours=9, minutes=30), END, "hour") == 10
+    assert bucket_count(END, END, "day") == 1
+
+
+def test_read_series_returns_every_bucket_with_data():
+    start = END - timedelta(hours=30)
+    first = start.replace(minute=0)
+
+    async def read():
+        db = AsyncMongoMockClient()["test"]
+        await db.analytics_hourly.insert_many([
+            {"_id": (first + timedelta(hours=i)).isoformat(), "bookings": {"created": i + 1}}
+            for i in range(bucket_count(start, END, "hour"))
+        ])
+        return await read_series(db, start, END, "hour")
+
+    series = asyncio.run(read())
+    assert len(series) == bucket_count(start, END, "hour") == 31
+    assert [bucket["bookings"]["created"] for bucket in series] == list(range(1, 32))
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from availability import SlotCalendar
+
+calendar = SlotCalendar(slot_minutes=30, day_start_hour=8, day_end_hour=20, tz="Asia/Kolkata")
+BEFORE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _db():
+    db = AsyncMongoMockClient()["test"]
+    asyncio.run(db.provider_slots.create_index([("provider_id", 1), ("slot_start", 1)], unique=True))
+    return db
+
+
+def test_parse_reads_naive_times_in_the_calendar_timezone():
+    assert calendar.parse("2026-11-01T10:00") == datetime(2026, 11, 1, 4, 30, tzinfo=timezone.utc)
+    assert calendar.parse("2026-11-01T10:00:00+00:00").utcoffset().total_seconds() == 0
+
+
+def test_slot_keys_cover_every_overlapped_slot_in_utc():
+    assert calendar.slot_keys(calendar.parse("2026-11-01T10:00"), 60) == [
+        "2026-11-01T04:30:00+00:00", "2026-11-01T05:00:00+00:00",
+    ]
+    # Off-grid starts floor to their slot and may spill into one more
+    assert calendar.slot_keys(calendar.parse("2026-11-01T10:15"), 30) == [
+        "2026-11-01T04:30:00+00:00", "2026-11-01T05:00:00+00:00",
+    ]
+    # A zero-length service still holds the slot it starts in
+    assert calendar.slot_keys(calendar.parse("2026-11-01T10:00"), 0) == ["2026-11-01T04:30:00+00:00"]
+
+
+def test_free_slots_skip_taken_slots_and_fit_the_duration():
+    db = _db()
+    asyncio.run(calendar.reserve(db, "p1", "b1", calendar.parse("2026-11-01T10:00"), 60))
+    free = asyncio.run(calendar.free_slots(db, "p1", date(2026, 11, 1), date(2026, 11, 1), 60, now=BEFORE))
+    starts = [slot["start"][11:16] for slot in free]
+    # 09:30 would run into the 10:00 booking and 19:30 past the end of the day
+    assert starts[:3] == ["08:00", "08:30", "09:00"]
+    assert "09:30" not in starts and "10:00" not in starts and "10:30" not in starts
+    assert starts[3] == "11:00"
+    assert starts[-1] == "19:00"
+    assert free[0]["end"] == "2026-11-01T09:00:00+05:30"
+    # Other providers are unaffected
+    assert len(asyncio.run(calendar.free_slots(db, "p2", date(2026, 11, 1), date(2026, 11, 1), 60, now=BEFORE))) == 23
+
+
+def test_free_slots_leave_out_the_past():
+    now = calendar.parse("2026-11-01T18:10")
+    free = asyncio.run(calendar.free_slots(_db(), "p1", date(2026, 11, 1), date(2026, 11, 2), 30, now=now))
+    assert [slot["start"][11:16] for slot in free[:3]] == ["18:30", "19:00", "19:30"]
+    assert free[3]["start"] == "2026-11-02T08:00:00+05:30"
+
+
+def test_overlapping_reservation_is_a_409_and_takes_no_slots():
+    db = _db()
+    asyncio.run(calendar.reserve(db, "p1", "b1", calendar.parse("2026-11-01T10:30"), 30))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(calendar.reserve(db, "p1", "b2", calendar.parse("2026-11-01T10:00"), 90))
+    assert exc.value.status_code == 409
+    assert asyncio.run(db.provider_slots.count_documents({"booking_id": "b2"})) == 0
+
+
+@pytest.mark.parametrize("scheduled, duration, detail", [
+    ("2025-12-31T10:00", 30, "future"),
+    ("2026-11-01T07:30", 30, "working hours"),
+    ("2026-11-01T19:45", 30, "working hours"),
+    ("2026-11-01T19:00", 90, "working hours"),
+    ("2026-11-01T02:00:00+00:00", 30, "working hours"),
+])
+def test_check_bookable_rejects_past_and_out_of_hours_times(scheduled, duration, detail):
+    with pytest.raises(HTTPException) as exc:
+        calendar.check_bookable(calendar.parse(scheduled), duration, now=BEFORE)
+    assert exc.value.status_code == 400
+    assert detail in exc.value.detail
+
+
+def test_check_bookable_accepts_a_booking_ending_at_close():
+    calendar.check_bookable(calendar.parse("2026-11-01T19:00"), 60, now=BEFORE)
+    calendar.check_bookable(calendar.parse("2026-11-01T08:00"), 0, now=BEFORE)
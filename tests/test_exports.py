@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from exports import iter_import_rows
+
+
+def _parse(body: bytes, fmt: str, chunk_size: int = 7) -> list:
+    """Rows parsed from ``body`` delivered in small chunks, so records straddle chunk boundaries."""
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    async def collect():
+        return [row async for row in iter_import_rows(chunks(), fmt)]
+
+    return asyncio.run(collect())
+
+
+def test_csv_rows_are_keyed_by_header_and_skip_empty_cells():
+    rows = _parse(b"title,price,location\r\nPlumbing,250,\r\n\r\nWiring,400,Vijayawada\r\n", "csv")
+    assert rows == [
+        (1, {"title": "Plumbing", "price": "250"}),
+        (2, {"title": "Wiring", "price": "400", "location": "Vijayawada"}),
+    ]
+
+
+def test_csv_quoted_field_may_span_lines_and_hold_commas_and_quotes():
+    body = b'title,description\n"Deep clean","Kitchen, bath\nand ""all"" rooms"\nTiling,Floors\n'
+    assert _parse(body, "csv") == [
+        (1, {"title": "Deep clean", "description": 'Kitchen, bath\nand "all" rooms'}),
+        (2, {"title": "Tiling", "description": "Floors"}),
+    ]
+
+
+def test_csv_byte_order_mark_is_dropped_from_the_first_header():
+    rows = _parse("\ufefftitle,price\nPainting,300\n".encode(), "csv", chunk_size=2)
+    assert rows == [(1, {"title": "Painting", "price": "300"})]
+
+
+def test_csv_row_with_too_many_columns_is_reported_and_parsing_continues():
+    rows = _parse(b"title,price\nA,1,extra\nB,2\nC\n", "csv")
+    assert rows == [
+        (1, "Expected 2 columns, got 3"),
+        (2, {"title": "B", "price": "2"}),
+        (3, {"title": "C"}),
+    ]
+
+
+def test_csv_unterminated_quote_at_end_of_body_is_an_error_row():
+    rows = _parse(b'title,price\nA,1\n"B,2\nC,3\n', "csv")
+    assert rows == [(1, {"title": "A", "price": "1"}), (2, "Unterminated quoted field")]
+
+
+@pytest.mark.parametrize("body", [b"", b"\n\n"])
+def test_csv_without_header_is_a_400(body):
+    with pytest.raises(HTTPException) as exc:
+        _parse(body, "csv")
+    assert exc.value.status_code == 400
+
+
+def test_ndjson_reports_bad_lines_by_row_number():
+    body = '{"title": "A"}\n\nnot json\n[1, 2]\n{"title": "Ünïcode"}'.encode()
+    rows = _parse(body, "ndjson")
+    assert rows[0] == (1, {"title": "A"})
+    assert rows[1][0] == 2 and rows[1][1].startswith("Invalid JSON")
+    assert rows[2] == (3, "Each line must be a JSON object")
+    assert rows[3] == (4, {"title": "Ünïcode"})
@@ -0,0 +1,107 @@
+import asyncio
+import math
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from geo import decode_geo_cursor, encode_geo_cursor, fetch_nearby, geo_point
+
+CENTER = (16.51, 80.61)
+
+
+def _distance_m(a, b):
+    (lng1, lat1), (lng2, lat2) = a, b
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * 6378100 * math.asin(math.sqrt(h))
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeGeoCollection:
+    """Evaluates the $geoNear and $limit stages of nearby_pipeline; mongomock has no $geoNear."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def aggregate(self, pipeline):
+        near, limit = pipeline[0]["$geoNear"], pipeline[1]["$limit"]
+        query = near.get("query", {})
+        excluded = query.get("_id", {}).get("$nin", [])
+        matches = []
+        for doc in self.docs:
+            if "geo" not in doc or doc["_id"] in excluded:
+                continue
+            if "category_id" in query and doc["category_id"] != query["category_id"]:
+                continue
+            distance = _distance_m(near["near"]["coordinates"], doc["geo"]["coordinates"])
+            if near.get("minDistance", 0) <= distance <= near["maxDistance"]:
+                matches.append({**doc, near["distanceField"]: distance})
+        # The server gives equal distances no particular order; descending ids keep ties out of insertion order
+        matches.sort(key=lambda doc: doc["_id"], reverse=True)
+        matches.sort(key=lambda doc: doc[near["distanceField"]])
+        return _Cursor(matches[:limit])
+
+
+def _walk(collection, category_id=None, limit=3):
+    async def walk():
+        seen, cursor = [], None
+        # Bounded, so a cursor that keeps returning the same ties fails instead of hanging
+        for _ in range(len(collection.docs)):
+            page, cursor = await fetch_nearby(collection, *CENTER, 4000, category_id, limit, cursor, {})
+            seen += page
+            if cursor is None:
+                return seen
+        raise AssertionError("nearby paging did not terminate")
+
+    return asyncio.run(walk())
+
+
+def _services():
+    docs = [
+        {"_id": ObjectId(), "category_id": "a" if i % 2 else "b", "geo": geo_point(16.5 + i * 0.001, 80.6 + i * 0.001)}
+        for i in range(12)
+    ]
+    # Seven services at one point: a tie wider than two pages
+    tied = geo_point(16.52, 80.62)
+    docs += [{"_id": ObjectId(), "category_id": "a", "geo": tied} for _ in range(7)]
+    docs.append({"_id": ObjectId(), "category_id": "a"})
+    return docs
+
+
+@pytest.mark.parametrize("category_id", [None, "a"])
+def test_pages_return_every_service_once_in_distance_order_across_ties(category_id):
+    docs = _services()
+    seen = _walk(FakeGeoCollection(docs), category_id)
+    expected = {
+        d["_id"] for d in docs
+        if "geo" in d and (category_id is None or d["category_id"] == category_id)
+    }
+    assert [d["_id"] for d in seen if d["_id"] in expected] == [d["_id"] for d in seen]
+    assert len(seen) == len(expected) == len({d["_id"] for d in seen})
+    distances = [d["distance_m"] for d in seen]
+    assert distances == sorted(distances)
+
+
+def test_cursor_accumulates_ids_while_a_tie_spans_pages():
+    first, second = ObjectId(), ObjectId()
+    page = [{"_id": "x", "distance_m": 1.0}, {"_id": first, "distance_m": 2.0}]
+    cursor = encode_geo_cursor(page)
+    assert decode_geo_cursor(cursor) == (2.0, [first])
+    cursor = encode_geo_cursor([{"_id": second, "distance_m": 2.0}], decode_geo_cursor(cursor))
+    assert decode_geo_cursor(cursor) == (2.0, [first, second])
+    # Once the distance moves on, earlier ties no longer need excluding
+    assert decode_geo_cursor(encode_geo_cursor([{"_id": "y", "distance_m": 3.0}], (2.0, [first]))) == (3.0, ["y"])
+
+
+def test_invalid_geo_cursor_is_a_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_geo_cursor("bogus")
+    assert exc.value.status_code == 400
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import apply_cursor, decode_cursor, encode_cursor, fetch_page
+
+
+def test_cursor_round_trips_object_and_string_ids():
+    oid = ObjectId()
+    assert decode_cursor(encode_cursor({"_id": oid, "created_at": "2025-01-01T00:00:00+00:00"})) == (
+        "2025-01-01T00:00:00+00:00", oid
+    )
+    assert decode_cursor(encode_cursor({"_id": "legacy-id", "created_at": None})) == (None, "legacy-id")
+
+
+def test_invalid_cursor_is_a_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_apply_cursor_without_cursor_keeps_query():
+    query = {"category_id": "c1"}
+    assert apply_cursor(query, None) is query
+
+
+def test_apply_cursor_continues_after_the_last_document():
+    oid = ObjectId()
+    after = {"$or": [
+        {"created_at": {"$lt": "2025-01-01T00:00:00+00:00"}},
+        {"created_at": "2025-01-01T00:00:00+00:00", "_id": {"$lt": oid}},
+    ]}
+    cursor = encode_cursor({"_id": oid, "created_at": "2025-01-01T00:00:00+00:00"})
+    assert apply_cursor({}, cursor) == after
+    assert apply_cursor({"category_id": "c1"}, cursor) == {"$and": [{"category_id": "c1"}, after]}
+
+
+def test_fetch_page_walks_every_document_once_across_created_at_ties():
+    async def walk():
+        collection = AsyncMongoMockClient()["test"]["services"]
+        # Four documents share each timestamp, so most page boundaries fall inside a tie
+        await collection.insert_many([
+            {"created_at": f"2025-01-0{1 + i // 4}T00:00:00+00:00", "category_id": "c1" if i % 3 else "c2"}
+            for i in range(20)
+        ])
+        expected = [
+            doc["_id"] for doc in await collection.find({"category_id": "c1"})
+            .sort([("created_at", -1), ("_id", -1)]).to_list(None)
+        ]
+        seen, cursor = [], None
+        while True:
+            page, cursor = await fetch_page(collection, {"category_id": "c1"}, 3, cursor)
+            seen += [doc["_id"] for doc in page]
+            if cursor is None:
+                return seen, expected
+
+    seen, expected = asyncio.run(walk())
+    assert seen == expected
+    assert len(expected) == 13
+
+
+def test_fetch_page_has_no_next_cursor_on_an_exactly_full_last_page():
+    async def fetch():
+        collection = AsyncMongoMockClient()["test"]["services"]
+        await collection.insert_many([{"created_at": f"2025-01-0{i + 1}T00:00:00+00:00"} for i in range(3)])
+        return await fetch_page(collection, {}, 3)
+
+    page, cursor = asyncio.run(fetch())
+    assert len(page) == 3
+    assert cursor is None